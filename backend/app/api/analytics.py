@@ -1,73 +1,428 @@
 import os
-import json
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-
-# Official Google Libraries
-from google.oauth2.credentials import Credentials
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest
-from google.analytics.admin import AnalyticsAdminServiceClient 
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Adjust these imports to match your project structure
-from app.api.deps import get_db, get_current_user 
-from app.db.models import Integration, User
+from app.api.deps import Principal, admit_upstream, get_async_db, get_current_user, get_stream_user
+from app.db.database import SessionLocal
+from app.db.models import Integration
+from app.core.cache import report_cache
+from app.core.admission import upstream_admission
+from app.core.responses import ClosingStreamingResponse, ConditionalRoute
+from app.core.security import vault
+from app.services import anomaly_engine, attribution, forecasting, metrics_store, portfolio, property_catalogue, report_export
+from app.services.google_clients import data_client_for, integration_namespace
+from app.services.ga4_reports import ReportSpec, iter_report_pages, run_realtime_report, run_reports
+from app.services.quota_scheduler import Priority, QuotaExhaustedError
+from app.services.realtime import realtime_hub
+
+# Every GET here answers If-None-Match with a 304 when the payload hasn't changed
+router = APIRouter(route_class=ConditionalRoute)
+# Routes that call Google on the request path take a per-user upstream slot, released when the handler returns.
+# /export holds its slot until the stream ends instead, and /live's shared poller takes one per poll.
+UPSTREAM_ADMISSION = Depends(admit_upstream, scope="function")
+
+# The reports every dashboard load needs; they go out together in one batchRunReports call
+SUMMARY_REPORT = ReportSpec(
+    name="summary",
+    metrics=("activeUsers", "screenPageViews", "bounceRate", "averageSessionDuration"),
+)
+CHANNEL_REPORT = ReportSpec(
+    name="channels",
+    dimensions=("sessionSource",),
+    metrics=("activeUsers", "screenPageViews"),
+)
+DASHBOARD_REPORTS = (SUMMARY_REPORT, CHANNEL_REPORT)
+# Headline KPIs for the last 30 minutes, pushed to live dashboards
+REALTIME_REPORT = ReportSpec(
+    name="realtime",
+    metrics=("activeUsers", "screenPageViews", "eventCount"),
+)
+
+
+def _report_cache_key(integration_id: int, property_id: str, specs, view: str = "dashboard") -> tuple:
+    """Cache key: (integration, property, report specs, date range rounded to the day).
+
+    `view` tells apart callers that format the same reports differently.
+    """
+    return ("ga4_report", view, integration_id, property_id, tuple(spec.cache_key() for spec in specs))
+
+
+def _fetch_dashboard_reports(client, property_id: str) -> dict:
+    """Runs the dashboard reports in one round trip and formats them for the frontend."""
+    results = run_reports(client, property_id, DASHBOARD_REPORTS)
+
+    summary = results[SUMMARY_REPORT.name]
+    summary_data = {"active_users": "0", "page_views": "0", "bounce_rate": "0%", "avg_duration": "0s"}
+    if summary.rows:
+        users, views, bounce_rate, avg_duration = summary.rows[0].metrics
+        summary_data = {
+            "active_users": str(users),
+            "page_views": str(views),
+            "bounce_rate": f"{round(bounce_rate * 100, 1)}%",
+            "avg_duration": f"{round(avg_duration, 1)}s"
+        }
+
+    post_level_data = []
+    for row in results[CHANNEL_REPORT.name].rows:
+        users, views = row.metrics
+        post_level_data.append({
+            "source": row.dimensions[0].capitalize(),
+            "users": int(users),
+            "views": int(views)
+        })
+
+    return {"summary": summary_data, "post_level": post_level_data}
+
+
+def _fetch_portfolio_summary(client, property_id: str) -> dict:
+    """Headline KPIs for one property, as numbers so the frontend can sort and total them."""
+    summary = run_reports(client, property_id, [SUMMARY_REPORT], timeout=portfolio.PORTFOLIO_PROPERTY_TIMEOUT_SECONDS)[SUMMARY_REPORT.name]
+    if not summary.rows:
+        return {"active_users": 0, "page_views": 0, "bounce_rate": 0.0, "avg_duration": 0.0}
+    users, views, bounce_rate, avg_duration = summary.rows[0].metrics
+    return {
+        "active_users": int(users),
+        "page_views": int(views),
+        "bounce_rate": round(bounce_rate * 100, 1),
+        "avg_duration": round(avg_duration, 1)
+    }
+
+
+def _fetch_realtime_kpis(integration_id: int, property_id: str) -> dict:
+    # Feeds outlive the request that started them, so the row is re-read on every poll:
+    # after a re-link the credentials are rebuilt from the new tokens, never from a stale copy
+    db = SessionLocal()
+    try:
+        integration = db.get(Integration, integration_id)
+    finally:
+        db.close()
+    if integration is None:
+        raise LookupError(f"integration {integration_id} was removed")
+    report = run_realtime_report(data_client_for(integration), property_id, REALTIME_REPORT)
+    users, views, events = report.rows[0].metrics if report.rows else (0, 0, 0)
+    return {
+        "status": "active",
+        "property_id": property_id,
+        "active_users": int(users),
+        "page_views": int(views),
+        "event_count": int(events),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _quota_exhausted_response(error: QuotaExhaustedError) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"data": {
+            "status": "quota_exhausted",
+            "retry_after": error.retry_after,
+            "message": "Google Analytics is rate limiting this property. Data will be back shortly."
+        }},
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+async def _get_ga_integration(db: AsyncSession, user: Principal):
+    return await db.scalar(select(Integration).where(
+        Integration.user_id == user.id,
+        Integration.provider == "google_analytics"
+    ).limit(1))
+
+
+def _require_property_access(integration: Integration, property_id: str) -> None:
+    """Stops users from reading stored metrics for properties their Google login can't see."""
+    properties_list = property_catalogue.get_stored_properties(integration) if integration else None
+    if not properties_list or property_id not in {prop["id"] for prop in properties_list}:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(current_user: Principal = Depends(get_current_user)):
+    """Hit/miss counters for the GA4 report cache."""
+    return {"data": report_cache.stats()}
+
+@router.post("/properties/resync", dependencies=[UPSTREAM_ADMISSION])
+async def resync_properties(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Re-pulls the GA4 property catalogue so newly added properties show up in the dropdown."""
+    integration = await _get_ga_integration(db, current_user)
+
+    if not integration:
+        raise HTTPException(status_code=404, detail="Google Analytics is not connected")
+
+    try:
+        properties_list = await property_catalogue.sync_properties_async(db, integration)
+    except Exception as e:
+        print(f"Admin API Error: {e}")
+        raise HTTPException(status_code=502, detail="Could not load properties from Google Analytics")
+
+    return {"data": {"properties": properties_list, "synced_at": integration.properties_synced_at}}
+
+@router.get("/portfolio", dependencies=[UPSTREAM_ADMISSION])
+async def get_portfolio(
+    max_concurrency: int = None,
+    refresh: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Summary KPIs for every property on the user's Google login in one response.
+
+    Properties are fetched in parallel (bounded by `max_concurrency`), and any that fail
+    or time out are reported individually instead of failing the whole response.
+    """
+    integration = await _get_ga_integration(db, current_user)
+    if not integration:
+        return {"data": {"status": "pending_integration"}}
+
+    properties_list = property_catalogue.get_stored_properties(integration)
+    if properties_list is None:
+        try:
+            properties_list = await property_catalogue.sync_properties_async(db, integration)
+        except Exception as e:
+            print(f"Admin API Error: {e}")
+            return {"data": {"status": "pending_integration"}}
+
+    concurrency = min(max_concurrency or portfolio.PORTFOLIO_MAX_CONCURRENCY, portfolio.PORTFOLIO_MAX_CONCURRENCY)
+    client = await run_in_threadpool(data_client_for, integration)
+    integration_id = integration.id
+
+    def fetch(property_id: str) -> dict:
+        return report_cache.get_or_load(
+            _report_cache_key(integration_id, property_id, (SUMMARY_REPORT,), view="portfolio"),
+            lambda: _fetch_portfolio_summary(client, property_id),
+            force_refresh=refresh,
+            namespace=integration_namespace(integration_id),
+        )
+
+    results = await run_in_threadpool(portfolio.fan_out, properties_list, fetch, max_concurrency=concurrency)
+    failed = sum(1 for entry in results if entry["status"] != "ok")
+    return {
+        "data": {
+            "status": "active" if failed < len(results) or not results else "error",
+            "properties": results,
+            "failed": failed,
+        }
+    }
+
+@router.get("/metrics")
+async def get_stored_metrics(
+    property_id: str,
+    start_date: date = None,
+    end_date: date = None,
+    compare: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Answers any date range (and period-over-period comparison) from the locally synced metrics store.
+
+    Defaults to the 30 days ending on the latest synced day.
+    """
+    integration = await _get_ga_integration(db, current_user)
+    _require_property_access(integration, property_id)
+
+    # The metrics store is shared with the worker, so it stays sync and runs on the async connection via run_sync
+    if end_date is None:
+        end_date = await db.run_sync(metrics_store.latest_synced_date, property_id) or date.today()
+    if start_date is None:
+        start_date = end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    return {"data": await db.run_sync(metrics_store.query_metrics, property_id, start_date, end_date, compare=compare)}
+
+@router.get("/forecast")
+async def get_forecast(
+    property_id: str,
+    metric: str = "sessions",
+    days: int = forecasting.FORECAST_HORIZON_DAYS,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Daily forecast with prediction intervals, read from the model the worker fits after each sync."""
+    integration = await _get_ga_integration(db, current_user)
+    _require_property_access(integration, property_id)
+
+    if metric not in forecasting.FORECAST_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(forecasting.FORECAST_METRICS)}")
+    if not 1 <= days <= forecasting.FORECAST_MAX_HORIZON_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {forecasting.FORECAST_MAX_HORIZON_DAYS}")
+
+    result = await db.run_sync(forecasting.forecast, property_id, metric, days)
+    if result is None:
+        return {"data": {"status": "pending", "message": "Not enough synced history to forecast this property yet."}}
+    return {"data": result}
+
+@router.get("/insights")
+async def get_insights(
+    property_id: str,
+    start_date: date = None,
+    end_date: date = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Campaign attribution and ROI: GA4 sessions and revenue joined with Google Ads / Meta Ads spend.
+
+    Ranks channels and paid campaigns by return on ad spend and cost per session. Defaults
+    to the 30 days ending on the latest synced day. Reads only the local stores.
+    """
+    integration = await _get_ga_integration(db, current_user)
+    _require_property_access(integration, property_id)
+
+    return {"data": await _property_insights(db, integration.id, property_id, current_user.id, start_date, end_date)}
+
+def _load_property_insights(property_id: str, user_id: int, start_date: date, end_date: date) -> dict:
+    db = SessionLocal()
+    try:
+        return attribution.property_insights(db, property_id, user_id, start_date, end_date)
+    finally:
+        db.close()
+
+async def _property_insights(db: AsyncSession, integration_id: int, property_id: str, user_id: int, start_date: date = None, end_date: date = None) -> dict:
+    """Attribution from the local stores, via the report cache; defaults to the 30 days ending on the latest synced day."""
+    if end_date is None:
+        end_date = await db.run_sync(metrics_store.latest_synced_date, property_id) or date.today()
+    if start_date is None:
+        start_date = end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    # Keyed on when the inputs were last synced, so a worker run (in another process) is picked up on the next load
+    version = await db.run_sync(attribution.inputs_version, property_id, user_id)
+    return await run_in_threadpool(
+        report_cache.get_or_load,
+        ("insights", property_id, user_id, start_date.isoformat(), end_date.isoformat(), version),
+        lambda: _load_property_insights(property_id, user_id, start_date, end_date),
+        namespace=integration_namespace(integration_id),
+    )
+
+@router.get("/export")
+async def export_report(
+    property_id: str,
+    format: str = "ndjson",
+    start_date: date = None,
+    end_date: date = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Streams daily campaign-level traffic straight from GA4 as NDJSON or CSV.
+
+    Pages through the report with limit/offset and writes each page as it arrives, so
+    exports of any size use constant memory. Defaults to the property's full history.
+    """
+    if format not in report_export.EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(report_export.EXPORT_MEDIA_TYPES)}")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    integration = await _get_ga_integration(db, current_user)
+    _require_property_access(integration, property_id)
+    # The export can run for minutes; don't hold a pooled DB connection for all of it
+    await db.close()
+
+    # The upstream slot is held until the last page is sent, not just until this handler returns
+    release = await upstream_admission.acquire(current_user.id)
+    try:
+        spec = replace(
+            report_export.CAMPAIGN_EXPORT_REPORT,
+            start_date=start_date.isoformat() if start_date else report_export.GA4_EARLIEST_DATE,
+            end_date=end_date.isoformat() if end_date else "today",
+        )
+        client = await run_in_threadpool(data_client_for, integration)
+        # Exports queue behind interactive dashboard calls for quota
+        pages = iter_report_pages(client, property_id, spec, page_size=report_export.EXPORT_PAGE_SIZE, priority=Priority.BACKGROUND)
+
+        # The first page is fetched before responding, so quota and auth errors still get a proper status code
+        try:
+            first_page = await run_in_threadpool(next, pages)
+        except QuotaExhaustedError as e:
+            release()
+            return _quota_exhausted_response(e)
+        except Exception as e:
+            print(f"GA4 export error: {e}")
+            raise HTTPException(status_code=502, detail="Could not read the report from Google Analytics")
+    except BaseException:
+        release()
+        raise
 
-router = APIRouter()
+    filename = f"ga4-{property_id.replace('/', '-')}-{spec.start_date}-{spec.end_date}.{'csv' if format == 'csv' else 'ndjson'}"
+    return ClosingStreamingResponse(
+        report_export.stream_pages(pages, first_page, format),
+        media_type=report_export.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+        on_close=release,
+    )
+
+@router.get("/live")
+async def stream_live_kpis(
+    property_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_stream_user)
+):
+    """Pushes realtime KPIs (last 30 minutes) for a property as server-sent events.
 
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
-TOKEN_URI = "https://oauth2.googleapis.com/token"
+    Every viewer of a property shares a single GA4 realtime poller, so a hundred open
+    dashboards cost one upstream query per interval. Listen with
+    `new EventSource("/api/v1/analytics/live?property_id=...&access_token=...")` for `kpis` events.
+    """
+    integration = await _get_ga_integration(db, current_user)
+    _require_property_access(integration, property_id)
+    # Streams stay open for hours; release the DB connection now
+    await db.close()
 
-@router.get("/dashboard")
-def get_dashboard_data(
+    integration_id = integration.id
+    return StreamingResponse(
+        # Polls take an upstream slot from the user who opened the feed
+        realtime_hub.event_stream((integration_id, property_id), lambda: _fetch_realtime_kpis(integration_id, property_id), tenant=current_user.id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx-style proxies from holding events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/dashboard", dependencies=[UPSTREAM_ADMISSION])
+async def get_dashboard_data(
+    background_tasks: BackgroundTasks,
     property_id: str = None, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    refresh: bool = False,
+    db: AsyncSession = Depends(get_async_db), 
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Fetches live Google Analytics data for the logged-in user dynamically."""
+    """Fetches Google Analytics data for the logged-in user, served from the report cache when fresh.
+
+    Pass `?refresh=1` to bypass the cache and pull live numbers.
+    """
     
-    integration = db.query(Integration).filter(
-        Integration.user_id == current_user.id,
-        Integration.provider == "google_analytics"
-    ).first()
+    integration = await _get_ga_integration(db, current_user)
 
     # 1. If they never connected
     if not integration:
         return {"data": {"status": "pending_integration"}}
 
-    creds_data = json.loads(integration.encrypted_credentials)
+    creds_data = vault.open(integration.encrypted_credentials)
     
     # 2. If the database row exists but is missing the token
     if not creds_data.get("access_token"):
          return {"data": {"status": "pending_integration"}}
     
-    credentials = Credentials(
-        token=creds_data.get("access_token"),
-        refresh_token=creds_data.get("refresh_token"),
-        token_uri=TOKEN_URI,
-        client_id=GOOGLE_CLIENT_ID,
-        client_secret=GOOGLE_CLIENT_SECRET,
-    )
-
-    admin_client = AnalyticsAdminServiceClient(credentials=credentials)
-    properties_list = []
-    
-    try:
-        # Ask Google for every account and property this user owns
-        account_summaries = admin_client.list_account_summaries()
-        for account in account_summaries:
-            for prop in account.property_summaries:
-                properties_list.append({
-                    "id": prop.property, # Formatted perfectly as "properties/12345"
-                    "name": f"{account.display_name} - {prop.display_name}"
-                })
-    except Exception as e:
-        print(f"Admin API Error: {e}")
-        # --- THE FIX: Graceful Degradation ---
-        # If the token is expired or invalid, don't crash the server!
-        # Tell the frontend to show the 'Sign in with Google' button so they can reconnect.
-        return {"data": {"status": "pending_integration"}}
+    # Read the property dropdown from the stored catalogue; only the very first load hits the Admin API
+    properties_list = property_catalogue.get_stored_properties(integration)
+    if properties_list is None:
+        try:
+            properties_list = await property_catalogue.sync_properties_async(db, integration)
+        except Exception as e:
+            print(f"Admin API Error: {e}")
+            # --- THE FIX: Graceful Degradation ---
+            # If the token is expired or invalid, don't crash the server!
+            # Tell the frontend to show the 'Sign in with Google' button so they can reconnect.
+            return {"data": {"status": "pending_integration"}}
+    elif property_catalogue.is_stale(integration):
+        background_tasks.add_task(property_catalogue.resync_in_background, integration.id)
 
     # If the user has GA connected but no actual websites set up in GA
     if not properties_list:
@@ -77,82 +432,61 @@ def get_dashboard_data(
     target_property_id = property_id if property_id else properties_list[0]["id"]
 
     # --- FETCH THE DATA ---
-    client = BetaAnalyticsDataClient(credentials=credentials)
+    # Client setup and GA4 calls block, so they run on the threadpool; the event loop stays free
+    client = await run_in_threadpool(data_client_for, integration)
 
     try:
-        # Summary Metrics
-        summary_request = RunReportRequest(
-            property=target_property_id,
-            dimensions=[],
-            metrics=[
-                Metric(name="activeUsers"),
-                Metric(name="screenPageViews"),
-                Metric(name="bounceRate"),
-                Metric(name="averageSessionDuration"),
-            ],
-            date_ranges=[DateRange(start_date="30daysAgo", end_date="today")],
-        )
-        summary_response = client.run_report(summary_request)
-        
-        summary_data = {"active_users": "0", "page_views": "0", "bounce_rate": "0%", "avg_duration": "0s"}
-        if summary_response.rows:
-            row = summary_response.rows[0]
-            summary_data = {
-                "active_users": row.metric_values[0].value,
-                "page_views": row.metric_values[1].value,
-                "bounce_rate": f"{round(float(row.metric_values[2].value) * 100, 1)}%",
-                "avg_duration": f"{round(float(row.metric_values[3].value), 1)}s"
-            }
-
-        # Channel Metrics
-        source_request = RunReportRequest(
-            property=target_property_id,
-            dimensions=[Dimension(name="sessionSource")],
-            metrics=[Metric(name="activeUsers"), Metric(name="screenPageViews")],
-            date_ranges=[DateRange(start_date="30daysAgo", end_date="today")],
+        reports = await run_in_threadpool(
+            report_cache.get_or_load,
+            _report_cache_key(integration.id, target_property_id, DASHBOARD_REPORTS),
+            lambda: _fetch_dashboard_reports(client, target_property_id),
+            force_refresh=refresh,
+            namespace=integration_namespace(integration.id),
         )
-        source_response = client.run_report(source_request)
-        
-        post_level_data = []
-        for row in source_response.rows:
-            post_level_data.append({
-                "source": row.dimension_values[0].value.capitalize(),
-                "users": int(row.metric_values[0].value),
-                "views": int(row.metric_values[1].value)
-            })
-
-        # --- DYNAMIC INSIGHTS ENGINE ---
-        if post_level_data:
-            top_channel = sorted(post_level_data, key=lambda x: x["views"], reverse=True)[0]
-            top_name = top_channel["source"]
-            
-            dynamic_insights = {
-                "primary_focus": f"Scale up {top_name}",
-                "reason": f"{top_name} is your absolute best acquisition channel, currently driving {top_channel['views']} views.",
-                "action_item": f"Reallocate 15% of your marketing budget or content resources to amplify {top_name}."
-            }
-        else:
-            dynamic_insights = {
-                "primary_focus": "Awaiting Data",
-                "reason": "Not enough traffic data recorded in the last 30 days.",
-                "action_item": "Ensure your GA4 tracking tag is installed on your website."
-            }
-
-        # --- SEND TO FRONTEND ---
-        return {
-            "data": {
-                "status": "active",
-                "company_name": current_user.company_name,
-                "active_property_id": target_property_id,
-                "properties": properties_list,
-                "summary": summary_data,
-                "post_level": post_level_data,
-                "anomaly": {"is_anomaly": False, "message": ""},
-                "suggestions": dynamic_insights
-            }
-        }
+        summary_data = reports["summary"]
+        post_level_data = reports["post_level"]
+
+    except QuotaExhaustedError as e:
+        # Out of GA4 quota is temporary and not the user's fault, so don't ask them to reconnect
+        return _quota_exhausted_response(e)
 
     except Exception as e:
         print(f"GA4 Data API Error: {e}")
         # Catch Data API token failures as well
-        return {"data": {"status": "pending_integration"}}
\ No newline at end of file
+        return {"data": {"status": "pending_integration"}}
+
+    # --- DYNAMIC INSIGHTS ENGINE ---
+    # Ranked on synced traffic and ad spend when the property has been ingested.
+    # Local-store failures aren't a Google problem, so they surface as errors instead of a reconnect prompt.
+    insights = await _property_insights(db, integration.id, target_property_id, current_user.id)
+    if insights["channels"]:
+        dynamic_insights = insights["suggestions"]
+    elif post_level_data:
+        top_channel = max(post_level_data, key=lambda x: x["views"])
+        top_name = top_channel["source"]
+
+        dynamic_insights = {
+            "primary_focus": f"Scale up {top_name}",
+            "reason": f"{top_name} is your absolute best acquisition channel, currently driving {top_channel['views']} views.",
+            "action_item": f"Reallocate 15% of your marketing budget or content resources to amplify {top_name}."
+        }
+    else:
+        dynamic_insights = {
+            "primary_focus": "Awaiting Data",
+            "reason": "Not enough traffic data recorded in the last 30 days.",
+            "action_item": "Ensure your GA4 tracking tag is installed on your website."
+        }
+
+    # --- SEND TO FRONTEND ---
+    return {
+        "data": {
+            "status": "active",
+            "company_name": current_user.company_name,
+            "active_property_id": target_property_id,
+            "properties": properties_list,
+            "summary": summary_data,
+            "post_level": post_level_data,
+            "anomaly": await db.run_sync(anomaly_engine.latest_anomaly, target_property_id),
+            "suggestions": dynamic_insights
+        }
+    }
\ No newline at end of file
@@ -1,63 +1,65 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import jwt
 from datetime import datetime, timedelta
 
-from app.db.database import get_db
+from app.core.hashing import hash_password, verify_password
+from app.db.database import get_async_db
 from app.db.models import User
 from app.schemas import UserCreate, UserLogin, UserResponse
 
 router = APIRouter()
 
-# 1. Setup Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 1. Password hashing lives in app/core/hashing.py (runs on its own bounded pool)
 
 # 2. Setup JWT configuration (In production, put the secret key in a .env file!)
 SECRET_KEY = "my-super-secret-saas-key"
 ALGORITHM = "HS256"
 
+async def _find_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(User).where(User.email == email).limit(1))
+
 @router.post("/register", response_model=UserResponse)
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if email is already taken
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await _find_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    
+
     # Hash the password and save the new user
-    hashed_pw = pwd_context.hash(user_data.password)
+    hashed_pw = await hash_password(user_data.password)
     new_user = User(
         company_name=user_data.company_name,
         email=user_data.email,
         hashed_password=hashed_pw
     )
-    
+
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 @router.post("/login")
-def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     # Find the user by email
-    user = db.query(User).filter(User.email == credentials.email).first()
-    
+    user = await _find_user_by_email(db, credentials.email)
+
     # Verify user exists and password is correct
-    if not user or not pwd_context.verify(credentials.password, user.hashed_password):
+    if not user or not await verify_password(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
-    
+
     # Generate the JWT VIP Token (valid for 24 hours)
     expire = datetime.utcnow() + timedelta(hours=24)
     token_data = {"sub": str(user.id), "exp": expire}
     token = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
-    
+
     return {
-        "access_token": token, 
+        "access_token": token,
         "token_type": "bearer",
         "user_id": user.id,
         "company_name": user.company_name
-    }
\ No newline at end of file
+    }
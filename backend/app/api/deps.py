@@ -1,38 +1,96 @@
+import os
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event
 import jwt
 
-from app.db.database import get_db
+from app.core.admission import upstream_admission
+from app.core.cache import TTLCache
+from app.db.database import SessionLocal, get_async_db, get_db
 from app.db.models import User
 from app.api.auth import SECRET_KEY, ALGORITHM
 
 # This tells FastAPI to look for the token in the "Authorization" header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Authenticated requests reuse a recently loaded user instead of querying `users` every time
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The logged-in user as routes see it: a detached, read-only snapshot of the `users` row."""
+    id: int
+    email: str
+    company_name: str
+
+
+principal_cache = TTLCache(ttl=PRINCIPAL_CACHE_TTL_SECONDS, max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, refresh_workers=1)
+
+
+def _load_principal(user_id: int):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        return Principal(id=user.id, email=user.email, company_name=user.company_name)
+    finally:
+        db.close()
+
+
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.invalidate(lambda key: key == user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    # Any change to a user (email, company name, deletion) drops their cached principal
+    invalidate_principal(target.id)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     try:
         # 1. Decode the token using our secret key
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-            
+        user_id = int(user_id)
+
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired. Please log in again.")
     except Exception:
         raise credentials_exception
-        
-    # 2. Find the user in the database
-    user = db.query(User).filter(User.id == int(user_id)).first()
+
+    # 2. Find the user (cached for a short TTL so most requests skip the database)
+    user = principal_cache.get_or_load(user_id, lambda: _load_principal(user_id))
     if user is None:
         raise credentials_exception
-        
-    # 3. Hand the user object to whatever API route requested it
-    return user
\ No newline at end of file
+
+    # 3. Hand the user to whatever API route requested it
+    return user
+
+
+def get_stream_user(token: str = Depends(optional_oauth2_scheme), access_token: str = None) -> Principal:
+    """get_current_user for event streams: browsers' EventSource can't set headers, so `?access_token=` works too."""
+    return get_current_user(token or access_token or "")
+
+
+async def admit_upstream(current_user: Principal = Depends(get_current_user)):
+    """Holds one of the user's upstream slots while the endpoint runs (use with scope="function").
+
+    Raises AdmissionRejected (429/503 with Retry-After) when the user or the server is saturated.
+    """
+    async with upstream_admission.admit(current_user.id):
+        yield
@@ -1,12 +1,20 @@
 import os
-import json 
+from typing import Optional
+
 import requests
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import RedirectResponse
 
-from app.api.deps import get_db, get_current_user
-from app.db.models import Integration, User
+from app.api.deps import Principal, get_async_db, get_current_user
+from app.core import telemetry
+from app.core.config import META_GRAPH_API_ENDPOINT
+from app.core.security import vault
+from app.core.shared_cache import shared_cache
+from app.db.models import Integration
+from app.services.token_manager import TOKEN_URI, expires_at_from, integration_namespace
 
 router = APIRouter()
 
@@ -17,95 +25,185 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 # It defaults to your live Render URL, but you can override it in your local .env
 BACKEND_URL = os.getenv("BACKEND_URL", "https://arbflow-backend.onrender.com")
 GOOGLE_REDIRECT_URI = f"{BACKEND_URL}/api/v1/integrations/google/callback"
+# Google Ads links as its own integration (its own consent screen and refresh token); register this URI in the Google console too
+GOOGLE_ADS_REDIRECT_URI = f"{BACKEND_URL}/api/v1/integrations/google-ads/callback"
+GOOGLE_ANALYTICS_SCOPE = "https://www.googleapis.com/auth/analytics.readonly"
+GOOGLE_ADS_SCOPE = "https://www.googleapis.com/auth/adwords"
+
+# Meta app used to link Meta Ads accounts (override in your .env)
+META_APP_ID = os.getenv("META_APP_ID")
+META_APP_SECRET = os.getenv("META_APP_SECRET")
+META_OAUTH_DIALOG_URL = os.getenv("META_OAUTH_DIALOG_URL", "https://www.facebook.com/v19.0/dialog/oauth")
+META_REDIRECT_URI = f"{BACKEND_URL}/api/v1/integrations/meta-ads/callback"
+META_ADS_SCOPE = "ads_read"
 
 # --- THE FIX 2: Dynamic Frontend URL for the final redirect ---
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://marketing-saas-platform-pi.vercel.app")
 
-@router.get("/google/link")
-def get_google_login_link(current_user: User = Depends(get_current_user)):
-    """Generates a personalized Google OAuth URL for the logged-in user."""
-    auth_url = (
+def _google_auth_url(scope: str, redirect_uri: str, state) -> str:
+    return (
         f"https://accounts.google.com/o/oauth2/v2/auth"
         f"?client_id={GOOGLE_CLIENT_ID}"
-        f"&redirect_uri={GOOGLE_REDIRECT_URI}"
+        f"&redirect_uri={redirect_uri}"
         f"&response_type=code"
-        f"&scope=https://www.googleapis.com/auth/analytics.readonly"
+        f"&scope={scope}"
         f"&access_type=offline"
         f"&prompt=consent"
-        f"&state={current_user.id}"  
+        f"&state={state}"
     )
-    return {"url": auth_url}
+
+def _user_id_from_state(state: str) -> int:
+    try:
+        return int(state)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user ID in state parameter")
+
+@router.get("/google/link")
+async def get_google_login_link(current_user: Principal = Depends(get_current_user)):
+    """Generates a personalized Google OAuth URL for the logged-in user."""
+    return {"url": _google_auth_url(GOOGLE_ANALYTICS_SCOPE, GOOGLE_REDIRECT_URI, current_user.id)}
 
 @router.get("/google/login")
-def google_login(user_id: str):
+async def google_login(user_id: str):
     """Generates the Google OAuth 2.0 URL and redirects the user."""
+    return RedirectResponse(url=_google_auth_url(GOOGLE_ANALYTICS_SCOPE, GOOGLE_REDIRECT_URI, user_id))
+
+@router.get("/google-ads/link")
+async def get_google_ads_link(login_customer_id: Optional[str] = None, current_user: Principal = Depends(get_current_user)):
+    """Google OAuth URL that links the user's Google Ads accounts, for spend in /analytics/insights.
+
+    Agencies pass the manager (MCC) account they sign in through as `login_customer_id`
+    (e.g. 123-456-7890); it rides along in the OAuth state and is stored with the integration.
+    """
+    state = str(current_user.id)
+    if login_customer_id:
+        login_customer_id = login_customer_id.replace("-", "").strip()
+        if not login_customer_id.isdigit():
+            raise HTTPException(status_code=400, detail="login_customer_id must be a Google Ads customer ID")
+        state = f"{state}.{login_customer_id}"
+    return {"url": _google_auth_url(GOOGLE_ADS_SCOPE, GOOGLE_ADS_REDIRECT_URI, state)}
+
+@router.get("/meta-ads/link")
+async def get_meta_ads_link(current_user: Principal = Depends(get_current_user)):
+    """Facebook Login URL that links the user's Meta ad accounts, for spend in /analytics/insights."""
     auth_url = (
-        f"https://accounts.google.com/o/oauth2/v2/auth"
-        f"?client_id={GOOGLE_CLIENT_ID}"
-        f"&redirect_uri={GOOGLE_REDIRECT_URI}"
+        f"{META_OAUTH_DIALOG_URL}"
+        f"?client_id={META_APP_ID}"
+        f"&redirect_uri={META_REDIRECT_URI}"
         f"&response_type=code"
-        f"&scope=https://www.googleapis.com/auth/analytics.readonly"
-        f"&access_type=offline"
-        f"&prompt=consent"
-        f"&state={user_id}" 
+        f"&scope={META_ADS_SCOPE}"
+        f"&state={current_user.id}"
     )
-    return RedirectResponse(url=auth_url)
+    return {"url": auth_url}
 
-@router.get("/google/callback")
-def google_callback(code: str, state: str, db: Session = Depends(get_db)): 
-    """Catches the auth code, exchanges for a token, and saves to PostgreSQL."""
-    
-    # 1. Convert state back to an integer user_id
-    try:
-        user_id = int(state)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid user ID in state parameter")
-    
-    # 2. Request the tokens from Google
-    token_url = "https://oauth2.googleapis.com/token"
+async def _exchange_google_code(code: str, redirect_uri: str) -> dict:
+    """Trades an authorization code for tokens, in the shape the token manager reads."""
     payload = {
         "client_id": GOOGLE_CLIENT_ID,
         "client_secret": GOOGLE_CLIENT_SECRET,
         "code": code,
         "grant_type": "authorization_code",
-        "redirect_uri": GOOGLE_REDIRECT_URI
+        "redirect_uri": redirect_uri
     }
     
-    response = requests.post(token_url, data=payload)
+    # `requests` blocks, so the exchange runs on the threadpool instead of the event loop
+    with telemetry.span("google_oauth", "authorization_code"):
+        response = await run_in_threadpool(requests.post, TOKEN_URI, data=payload)
     token_data = response.json()
-    
+
     if "error" in token_data:
         raise HTTPException(status_code=400, detail=token_data.get("error_description", "Unknown error"))
-        
-    # 3. Package the tokens into a JSON string for the database
-    credentials_dict = {
+
+    return {
         "access_token": token_data.get("access_token"),
-        "refresh_token": token_data.get("refresh_token"), 
+        "refresh_token": token_data.get("refresh_token"),
         "expires_in": token_data.get("expires_in"),
+        # Absolute expiry so the token manager knows when to refresh ahead of time
+        "expires_at": expires_at_from(token_data.get("expires_in")),
         "token_type": token_data.get("token_type")
     }
-    credentials_json = json.dumps(credentials_dict)
-    
-    # 4. The Upsert Logic: Check if this user already connected Google Analytics
-    existing_integration = db.query(Integration).filter(
+
+async def _save_integration(db: AsyncSession, user_id: int, provider: str, credentials_dict: dict) -> None:
+    """Creates or re-links the user's integration for `provider` with freshly sealed credentials."""
+    sealed_credentials = vault.seal(credentials_dict)
+
+    # The Upsert Logic: Check if this user already connected this provider
+    existing_integration = await db.scalar(select(Integration).where(
         Integration.user_id == user_id,
-        Integration.provider == "google_analytics"  
-    ).first()
-    
+        Integration.provider == provider
+    ).limit(1))
+
     if existing_integration:
-        # Update existing record
-        existing_integration.encrypted_credentials = credentials_json  
+        existing_integration.encrypted_credentials = sealed_credentials
+        # A new Google login may see different properties, so mark the stored catalogue stale
+        existing_integration.properties_synced_at = None
     else:
-        # Create new record
-        new_integration = Integration(
+        db.add(Integration(
             user_id=user_id,
-            provider="google_analytics",  
-            encrypted_credentials=credentials_json  
-        )
-        db.add(new_integration)
-        
-    # 5. Commit the transaction to Neon!
-    db.commit()
-    
-    # 6. Redirect the user back to your live Next.js frontend
+            provider=provider,
+            encrypted_credentials=sealed_credentials
+        ))
+
+    await db.commit()
+
+    # Cached reports, pooled clients and credentials all belong to the old login; retire them in every worker
+    if existing_integration:
+        shared_cache.invalidate(integration_namespace(existing_integration.id))
+
+@router.get("/google/callback")
+async def google_callback(code: str, state: str, db: AsyncSession = Depends(get_async_db)):
+    """Catches the auth code, exchanges for a token, and saves to PostgreSQL."""
+    user_id = _user_id_from_state(state)
+    credentials_dict = await _exchange_google_code(code, GOOGLE_REDIRECT_URI)
+    await _save_integration(db, user_id, "google_analytics", credentials_dict)
+
+    # Redirect the user back to your live Next.js frontend
+    return RedirectResponse(url=f"{FRONTEND_URL}/dashboard?integration=success")
+
+@router.get("/google-ads/callback")
+async def google_ads_callback(code: str, state: str, db: AsyncSession = Depends(get_async_db)):
+    """Saves the Google Ads login; the ads sync worker picks its accounts up on its next run."""
+    user_state, _, login_customer_id = state.partition(".")
+    user_id = _user_id_from_state(user_state)
+    credentials_dict = await _exchange_google_code(code, GOOGLE_ADS_REDIRECT_URI)
+    if login_customer_id.isdigit():
+        credentials_dict["login_customer_id"] = login_customer_id
+    await _save_integration(db, user_id, "google_ads", credentials_dict)
+    return RedirectResponse(url=f"{FRONTEND_URL}/dashboard?integration=success")
+
+def _meta_token(params: dict) -> dict:
+    response = requests.get(f"{META_GRAPH_API_ENDPOINT}/oauth/access_token", params=params)
+    token_data = response.json()
+    if "error" in token_data:
+        raise HTTPException(status_code=400, detail=token_data["error"].get("message", "Unknown error"))
+    return token_data
+
+@router.get("/meta-ads/callback")
+async def meta_ads_callback(code: str, state: str, db: AsyncSession = Depends(get_async_db)):
+    """Trades the Facebook Login code for a long-lived (about 60 day) token and saves it.
+
+    Meta issues no refresh token; when it lapses the ads sync logs the failure and the user links again.
+    """
+    user_id = _user_id_from_state(state)
+    with telemetry.span("meta_oauth", "authorization_code"):
+        short_lived = await run_in_threadpool(_meta_token, {
+            "client_id": META_APP_ID,
+            "client_secret": META_APP_SECRET,
+            "redirect_uri": META_REDIRECT_URI,
+            "code": code,
+        })
+    with telemetry.span("meta_oauth", "fb_exchange_token"):
+        token_data = await run_in_threadpool(_meta_token, {
+            "grant_type": "fb_exchange_token",
+            "client_id": META_APP_ID,
+            "client_secret": META_APP_SECRET,
+            "fb_exchange_token": short_lived.get("access_token"),
+        })
+
+    await _save_integration(db, user_id, "meta_ads", {
+        "access_token": token_data.get("access_token"),
+        # System-user tokens never expire and come without expires_in
+        "expires_at": expires_at_from(token_data["expires_in"]) if token_data.get("expires_in") else None,
+        "token_type": token_data.get("token_type")
+    })
     return RedirectResponse(url=f"{FRONTEND_URL}/dashboard?integration=success")
\ No newline at end of file
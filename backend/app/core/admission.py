@@ -0,0 +1,183 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Deque, Dict, Hashable
+
+# Admission control for upstream-heavy endpoints (override in your .env).
+# Keep the global cap below the threadpool size (40 by default) so logins and callbacks always find a thread.
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "24"))
+ADMISSION_TENANT_CONCURRENCY = int(os.getenv("ADMISSION_TENANT_CONCURRENCY", "4"))
+ADMISSION_TENANT_QUEUE = int(os.getenv("ADMISSION_TENANT_QUEUE", "8"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "5"))
+# Starting guess for how long one admitted request holds its slot
+DEFAULT_HOLD_SECONDS = 1.0
+
+
+class AdmissionRejected(Exception):
+    """The request was turned away before doing any upstream work. Retry after `retry_after` seconds.
+
+    429 when this tenant already has too much queued; 503 when the server as a whole is saturated.
+    """
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"{reason}, retry in {retry_after}s")
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Tenant:
+    __slots__ = ("active", "waiters")
+
+    def __init__(self):
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class AdmissionController:
+    """Caps in-flight upstream work globally and per tenant, queuing fairly between tenants.
+
+    Each tenant may run `tenant_concurrency` requests at once and queue `tenant_queue` more.
+    When a slot frees up it goes to the next tenant in round-robin order, not to whoever
+    queued first, so one agency clicking through fifty properties can't starve the others.
+    Requests that can't be queued, or wait longer than `max_wait`, are rejected straight away
+    with a Retry-After estimate instead of piling up on the threadpool.
+
+    State lives on the event loop and is per process; with several uvicorn workers each has its own.
+    """
+
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT, tenant_concurrency: int = ADMISSION_TENANT_CONCURRENCY,
+                 tenant_queue: int = ADMISSION_TENANT_QUEUE, max_wait: float = ADMISSION_MAX_WAIT_SECONDS):
+        self.max_in_flight = max_in_flight
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_queue = tenant_queue
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self._tenants: Dict[Hashable, _Tenant] = {}
+        # Tenants with queued requests, in the order they get the next free slot
+        self._turns: Deque[Hashable] = deque()
+        self._hold_seconds = DEFAULT_HOLD_SECONDS
+        self._rejected = {429: 0, 503: 0}
+        self._admitted = 0
+
+    @asynccontextmanager
+    async def admit(self, tenant: Hashable):
+        """Holds one slot for `tenant` for the body of the `async with`, or raises AdmissionRejected."""
+        release = await self.acquire(tenant)
+        try:
+            yield
+        finally:
+            release()
+
+    async def acquire(self, tenant: Hashable) -> Callable[[], None]:
+        """Takes one slot for `tenant`, or raises AdmissionRejected, and returns the function that gives it back.
+
+        For work that outlives a block, such as a streamed response. Calling the release more than once is harmless.
+        """
+        await self._acquire(tenant)
+        started = time.monotonic()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._release(tenant, time.monotonic() - started)
+
+        return release
+
+    async def _acquire(self, tenant: Hashable) -> None:
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _Tenant()
+
+        if not state.waiters and state.active < self.tenant_concurrency and self._in_flight < self.max_in_flight:
+            self._grant(state)
+            return
+
+        if len(state.waiters) >= self.tenant_queue:
+            self._forget_if_idle(tenant)
+            self._reject(429, self._retry_after(state.active + len(state.waiters), self.tenant_concurrency), "Too many requests queued for this account")
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        if tenant not in self._turns:
+            self._turns.append(tenant)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we gave up: hand the slot straight on
+                self._release(tenant, 0.0)
+            else:
+                waiter.cancel()
+                state.waiters.remove(waiter)
+                self._forget_if_idle(tenant)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject(503, self._retry_after(self._queued(), self.max_in_flight), "Server is busy")
+
+    def _grant(self, state: _Tenant) -> None:
+        state.active += 1
+        self._in_flight += 1
+        self._admitted += 1
+
+    def _release(self, tenant: Hashable, held: float) -> None:
+        state = self._tenants[tenant]
+        state.active -= 1
+        self._in_flight -= 1
+        if held:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held
+        self._dispatch()
+        self._forget_if_idle(tenant)
+
+    def _dispatch(self) -> None:
+        """Hands free slots to queued tenants in turn, skipping tenants already at their own limit."""
+        skipped = 0
+        while self._turns and self._in_flight < self.max_in_flight and skipped < len(self._turns):
+            tenant = self._turns.popleft()
+            state = self._tenants[tenant]
+            if state.active >= self.tenant_concurrency:
+                self._turns.append(tenant)
+                skipped += 1
+                continue
+            self._grant(state)
+            state.waiters.popleft().set_result(None)
+            if state.waiters:
+                self._turns.append(tenant)
+            skipped = 0
+
+    def _forget_if_idle(self, tenant: Hashable) -> None:
+        state = self._tenants.get(tenant)
+        if state is not None and not state.active and not state.waiters:
+            del self._tenants[tenant]
+        if (state is None or not state.waiters) and tenant in self._turns:
+            self._turns.remove(tenant)
+
+    def _queued(self) -> int:
+        return sum(len(state.waiters) for state in self._tenants.values())
+
+    def _retry_after(self, ahead: int, slots: int) -> int:
+        """Seconds until `ahead` requests sharing `slots` slots should have drained, at the recent hold time."""
+        return max(1, math.ceil(self._hold_seconds * ahead / max(slots, 1)))
+
+    def _reject(self, status_code: int, retry_after: int, reason: str) -> None:
+        self._rejected[status_code] += 1
+        raise AdmissionRejected(status_code, retry_after, reason)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued(),
+            "tenants": len(self._tenants),
+            "admitted": self._admitted,
+            "rejected_429": self._rejected[429],
+            "rejected_503": self._rejected[503],
+            "hold_seconds": round(self._hold_seconds, 3),
+        }
+
+
+upstream_admission = AdmissionController()
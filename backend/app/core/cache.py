@@ -0,0 +1,196 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from app.core.shared_cache import SharedCache, shared_cache
+
+# Cache tuning knobs (override in your .env)
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", "900"))
+REPORT_CACHE_STALE_SECONDS = int(os.getenv("REPORT_CACHE_STALE_SECONDS", "3600"))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "1024"))
+
+_DAYS_AGO = re.compile(r"^(\d+)daysAgo$")
+# Marks the refresher threads while they reload a stale entry
+_refresh_context = threading.local()
+
+
+def in_background_refresh() -> bool:
+    """True while a loader runs as a stale-while-revalidate refresh, i.e. with no user waiting on it."""
+    return getattr(_refresh_context, "active", False)
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "generation")
+
+    def __init__(self, value: Any, stored_at: float, generation: int = 0):
+        self.value = value
+        self.stored_at = stored_at
+        self.generation = generation
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a TTL, stale-while-revalidate and miss coalescing.
+
+    * Fresh entries (younger than `ttl`) are returned straight away.
+    * Stale entries (older than `ttl` but younger than `ttl + stale_ttl`) are
+      returned straight away too, while a single background refresh runs.
+    * Concurrent misses on the same key share one call to the loader.
+
+    With a `shared` tier, misses are looked up there before calling the loader and loaded
+    values are written back, so workers share each other's results (values must be JSON).
+    Entries loaded under a `namespace` stop matching once it is invalidated in any worker.
+    """
+
+    def __init__(self, ttl: int, stale_ttl: int = 0, max_entries: int = 1024, refresh_workers: int = 4,
+                 shared: Optional[SharedCache] = None, name: str = "cache"):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self.name = name
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: dict = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "load_errors": 0, "shared_hits": 0}
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], force_refresh: bool = False, namespace: Optional[str] = None) -> Any:
+        """Returns the cached value for `key`, calling `loader` only when needed."""
+        generation = self.shared.generation(namespace) if self.shared is not None else 0
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation == generation and not force_refresh:
+                age = now - entry.stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    self._refresh_locked(key, loader, namespace, generation)
+                    return entry.value
+
+            # Miss (or forced refresh): join an identical in-flight load if there is one
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                owner = False
+            else:
+                self._stats["misses"] += 1
+                future = self._inflight[key] = Future()
+                owner = True
+
+        if owner:
+            # A forced refresh must reach the loader; otherwise another worker's result will do, even a stale one
+            self._load(key, loader, future, namespace, generation, shared_max_age=None if force_refresh else self.ttl + self.stale_ttl)
+        return future.result()
+
+    def _refresh_locked(self, key: Hashable, loader: Callable[[], Any], namespace: Optional[str], generation: int) -> None:
+        """Starts one background refresh for `key`; the caller holds the lock."""
+        if key not in self._inflight:
+            self._inflight[key] = Future()
+            # Only a fresh shared entry saves the refresh
+            self._refresher.submit(self._refresh, key, loader, self._inflight[key], namespace, generation)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any], future: Future, namespace: Optional[str], generation: int) -> None:
+        _refresh_context.active = True
+        try:
+            self._load(key, loader, future, namespace, generation, self.ttl)
+        finally:
+            _refresh_context.active = False
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], future: Future, namespace: Optional[str] = None,
+              generation: int = 0, shared_max_age: Optional[float] = None) -> None:
+        if self.shared is not None and shared_max_age is not None:
+            hit = self.shared.get(self.name, key, namespace, generation)
+            if hit is not None and hit[1] < shared_max_age:
+                value, age = hit
+                with self._lock:
+                    self._stats["shared_hits"] += 1
+                    self._store(key, value, time.monotonic() - age, generation)
+                    if age >= self.ttl:
+                        self._refresh_locked(key, loader, namespace, generation)
+                future.set_result(value)
+                return
+
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._store(key, value, time.monotonic(), generation)
+        if self.shared is not None:
+            self.shared.set(self.name, key, value, self.ttl + self.stale_ttl, namespace, generation)
+        future.set_result(value)
+
+    def _store(self, key: Hashable, value: Any, stored_at: float, generation: int) -> None:
+        """Puts a loaded value in the LRU and retires its in-flight marker; the caller holds the lock."""
+        self._entries[key] = _Entry(value, stored_at, generation)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+        self._inflight.pop(key, None)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drops every entry whose key matches `predicate`. Returns how many were dropped."""
+        with self._lock:
+            doomed = [key for key in self._entries if predicate(key)]
+            for key in doomed:
+                del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def _resolve_relative_date(value: str, today: date) -> str:
+    if value == "today":
+        return today.isoformat()
+    if value == "yesterday":
+        return (today - timedelta(days=1)).isoformat()
+    match = _DAYS_AGO.match(value)
+    if match:
+        return (today - timedelta(days=int(match.group(1)))).isoformat()
+    return value
+
+
+def resolve_date_range(start_date: str, end_date: str, today: Optional[date] = None) -> Tuple[str, str]:
+    """Rounds GA4 relative dates ("30daysAgo", "today") to calendar days for use in cache keys.
+
+    Every request made on the same day maps to the same key, so they all share one cache entry.
+    """
+    today = today or date.today()
+    return _resolve_relative_date(start_date, today), _resolve_relative_date(end_date, today)
+
+
+# Shared cache for parsed GA4 report results, backed by the cross-worker tier
+report_cache = TTLCache(
+    ttl=REPORT_CACHE_TTL_SECONDS,
+    stale_ttl=REPORT_CACHE_STALE_SECONDS,
+    max_entries=REPORT_CACHE_MAX_ENTRIES,
+    shared=shared_cache,
+    name="ga4_reports",
+)
@@ -0,0 +1,88 @@
+import os
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError: # Optional: without it responses are gzip-only
+    brotli = None
+
+# Compression knobs (override in your .env)
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1000"))
+# Dynamic responses are compressed on every request, so favour speed over the last few percent
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q-value}, e.g. "br;q=0, gzip" -> {"br": 0.0, "gzip": 1.0}."""
+    weights = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    # A q-value we can't read is not a yes
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """"br", "gzip" or None (identity): the accepted coding with the highest q, brotli on a tie."""
+    weights = accepted_encodings(header)
+    # "*" stands for every coding the client didn't name
+    wildcard = weights.get("*", 0.0)
+    candidates = [("br", weights.get("br", wildcard))] if brotli is not None else []
+    candidates.append(("gzip", weights.get("gzip", wildcard)))
+    coding, q = max(candidates, key=lambda candidate: candidate[1])
+    return coding if q > 0 else None
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = BROTLI_QUALITY):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        compressed = self.compressor.process(body)
+        # Streaming chunks are flushed so the client can decode each one as it arrives
+        return compressed + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Brotli or gzip, whichever the client's Accept-Encoding weighs higher (brotli only with the `brotli` package).
+
+    Small bodies, event streams and already-encoded responses are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE, compresslevel: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Parsed with q-values: "br;q=0" is a refusal, not a match
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,5 @@
+import os
+
+# Upstream endpoints needed by modules that must stay light at startup (override in your .env).
+# Point META_GRAPH_API_ENDPOINT at benchmarks/fake_ads.py to test locally.
+META_GRAPH_API_ENDPOINT = os.getenv("META_GRAPH_API_ENDPOINT", "https://graph.facebook.com/v19.0").rstrip("/")
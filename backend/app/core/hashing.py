@@ -0,0 +1,24 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+# bcrypt is deliberately slow (~250ms of CPU). It gets its own small pool so a burst of
+# logins queues here instead of filling the shared worker threadpool and stalling
+# every other endpoint. bcrypt releases the GIL, so threads give real parallelism.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, pwd_context.verify, password, hashed_password)
@@ -0,0 +1,79 @@
+import hashlib
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.types import Receive, Scope, Send
+from fastapi.routing import APIRoute
+
+try:
+    import orjson
+except ImportError: # Optional: falls back to the stdlib encoder
+    orjson = None
+
+# Browsers may keep the response but must revalidate it (If-None-Match) before every reuse
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it's installed (several times faster on big payloads)."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """StreamingResponse that calls `on_close` once the body is done: finished, failed, or the client went away."""
+
+    def __init__(self, *args, on_close: Callable[[], None], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+
+def content_etag(body: bytes) -> str:
+    # Weak, because compression changes the bytes on the wire but not the content
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+class ConditionalRoute(APIRoute):
+    """Route class that tags successful GET responses with a content-hash ETag.
+
+    A request whose If-None-Match already holds that ETag gets an empty 304 instead
+    of the full body. Dashboards that poll all day only download a payload when it changed.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def conditional_handler(request: Request) -> Response:
+            response = await handler(request)
+            # Streaming responses have no body to hash up front
+            if request.method != "GET" or response.status_code != 200 or not hasattr(response, "body"):
+                return response
+
+            etag = content_etag(response.body)
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL})
+            response.headers["ETag"] = etag
+            response.headers.setdefault("Cache-Control", REVALIDATE_CACHE_CONTROL)
+            return response
+
+        return conditional_handler
@@ -0,0 +1,45 @@
+import random
+import time
+from typing import Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+def transient_google_errors() -> Tuple[Type[Exception], ...]:
+    """Upstream errors worth retrying: throttling, timeouts and 5xx."""
+    # The Google SDK (and grpc) is imported on first use, not at startup
+    from google.api_core import exceptions as google_exceptions
+
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.Aborted,
+    )
+
+
+def with_retries(
+    fn: Callable[[], T],
+    retry_on: Optional[Tuple[Type[Exception], ...]] = None,
+    attempts: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+) -> T:
+    """Calls `fn`, retrying transient failures (transient Google errors by default) with exponential backoff and full jitter."""
+    if retry_on is None:
+        retry_on = transient_google_errors()
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt == attempts:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            # Errors that know when to come back (e.g. quota exhaustion) override the backoff
+            delay = max(delay, getattr(e, "retry_after", 0) or 0)
+            print(f"Transient upstream error (attempt {attempt}/{attempts}), retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
@@ -1,12 +1,25 @@
-from cryptography.fernet import Fernet
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
 
-# CRITICAL SECURITY NOTE: 
-# For this MVP, we are hardcoding this encryption key. 
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+# CRITICAL SECURITY NOTE:
+# For this MVP, we are hardcoding this encryption key.
 # When you deploy, this MUST be moved to a .env file so it never touches GitHub!
 # This is a valid Fernet (AES) 32-byte url-safe base64-encoded key.
 ENCRYPTION_KEY = b'r-O-P9Kz4Ew9p38hG3c2zH_9Gv7m9E-qL_d3M2k1AF8='
 
-cipher_suite = Fernet(ENCRYPTION_KEY)
+# Comma-separated Fernet keys, newest first. The first one encrypts; every one of them decrypts.
+# To rotate: put the new key in front, deploy, run `python -m app.worker rotate-keys`, then drop the old key.
+ENCRYPTION_KEYS = [key.strip().encode() for key in os.getenv("ENCRYPTION_KEYS", "").split(",") if key.strip()] or [ENCRYPTION_KEY]
+# How many decrypted credential blobs to keep in memory
+VAULT_CACHE_MAX_ENTRIES = int(os.getenv("VAULT_CACHE_MAX_ENTRIES", "1024"))
+
+_primary_cipher = Fernet(ENCRYPTION_KEYS[0])
+cipher_suite = MultiFernet([Fernet(key) for key in ENCRYPTION_KEYS])
 
 def encrypt_data(data: str) -> str:
     """Encrypts a string (like a JSON key) into an unreadable token."""
@@ -14,4 +27,71 @@ def encrypt_data(data: str) -> str:
 
 def decrypt_data(encrypted_data: str) -> str:
     """Decrypts a token back into the original string."""
-    return cipher_suite.decrypt(encrypted_data.encode('utf-8')).decode('utf-8')
\ No newline at end of file
+    return cipher_suite.decrypt(encrypted_data.encode('utf-8')).decode('utf-8')
+
+
+def _is_plaintext(stored: str) -> bool:
+    # Rows written before the vault hold the raw OAuth JSON
+    return stored.lstrip().startswith("{")
+
+
+class CredentialVault:
+    """The only way credentials get in and out of `Integration.encrypted_credentials`.
+
+    `seal` encrypts a credentials dict with the newest key; `open` decrypts with any
+    configured key and still reads legacy plaintext JSON rows. Decrypted blobs are kept
+    in a bounded LRU keyed by the ciphertext itself. A rewritten row has a new ciphertext
+    and misses, so there is nothing to invalidate.
+    """
+
+    def __init__(self, max_entries: int = VAULT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, stored: Optional[str]) -> dict:
+        """Returns the decrypted credentials dict (a copy the caller may modify)."""
+        if not stored:
+            return {}
+        with self._lock:
+            cached = self._cache.get(stored)
+            if cached is not None:
+                self._cache.move_to_end(stored)
+                return dict(cached)
+
+        credentials = json.loads(stored if _is_plaintext(stored) else decrypt_data(stored))
+        self._remember(stored, credentials)
+        return dict(credentials)
+
+    def seal(self, credentials: dict) -> str:
+        """Encrypts a credentials dict for storage with the newest key."""
+        stored = encrypt_data(json.dumps(credentials))
+        # The row is about to be read back by the same process, so warm the cache
+        self._remember(stored, dict(credentials))
+        return stored
+
+    def rotate(self, stored: Optional[str]) -> Optional[str]:
+        """Re-encrypts a stored value with the newest key, or returns None if it already uses it."""
+        if not stored:
+            return None
+        if _is_plaintext(stored):
+            return encrypt_data(stored)
+        try:
+            _primary_cipher.decrypt(stored.encode('utf-8'))
+            return None
+        except InvalidToken:
+            return cipher_suite.rotate(stored.encode('utf-8')).decode('utf-8')
+
+    def _remember(self, stored: str, credentials: dict) -> None:
+        with self._lock:
+            self._cache[stored] = credentials
+            self._cache.move_to_end(stored)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+vault = CredentialVault()
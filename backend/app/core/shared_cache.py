@@ -0,0 +1,260 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+# Shared (L2) cache tier behind the in-process caches (override in your .env).
+#   sqlite:///path/to/file  - shared by every worker on the host, survives restarts
+#   redis://host:6379/0     - shared across hosts; needs the `redis` package
+#   none                    - in-process caches only
+# The default is a SQLite file named after DATABASE_URL, so two deployments (or a staging and a dev
+# checkout) on one host never serve each other's entries: keys are only integration and property ids.
+_DATABASE_TAG = hashlib.sha256(os.getenv("DATABASE_URL", "").encode()).hexdigest()[:16]
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), f'arbflow-cache-{_DATABASE_TAG}.sqlite3')}")
+# How often each worker picks up invalidations made by the others
+SHARED_CACHE_SYNC_SECONDS = float(os.getenv("SHARED_CACHE_SYNC_SECONDS", "1"))
+# Bump when the stored layout changes; entries written in an older format are simply never read
+SHARED_CACHE_FORMAT = 1
+SQLITE_PURGE_INTERVAL_SECONDS = 300
+
+
+class SQLiteBackend:
+    """Shared store in one SQLite file (WAL mode), for several uvicorn workers on the same host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._purged_at = time.time()
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS cache_generations (namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute("SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        db = self._connection()
+        db.execute("INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)", (key, value, now + ttl))
+        if now - self._purged_at > SQLITE_PURGE_INTERVAL_SECONDS:
+            self._purged_at = now
+            db.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+
+    def bump(self, namespace: str) -> int:
+        db = self._connection()
+        db.execute(
+            "INSERT INTO cache_generations (namespace, generation) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1",
+            (namespace,),
+        )
+        return db.execute("SELECT generation FROM cache_generations WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def generations(self) -> Dict[str, int]:
+        return dict(self._connection().execute("SELECT namespace, generation FROM cache_generations").fetchall())
+
+
+class RedisBackend:
+    """Shared store in Redis, for workers spread over several hosts."""
+
+    # Scoped to the database too, in case several deployments share one Redis
+    PREFIX = f"arbflow:cache:{_DATABASE_TAG}:"
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(self.PREFIX + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._redis.set(self.PREFIX + key, value, px=max(1, int(ttl * 1000)))
+
+    def bump(self, namespace: str) -> int:
+        return int(self._redis.hincrby(self.PREFIX + "generations", namespace, 1))
+
+    def generations(self) -> Dict[str, int]:
+        return {name.decode(): int(value) for name, value in self._redis.hgetall(self.PREFIX + "generations").items()}
+
+
+def backend_from_url(url: str):
+    """Builds the backend for SHARED_CACHE_URL, or None for in-process caching only."""
+    if not url or url == "none":
+        return None
+    try:
+        if url.startswith("sqlite:///"):
+            return SQLiteBackend(url[len("sqlite:///"):])
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            return RedisBackend(url)
+    except Exception as e:
+        print(f"Shared cache unavailable ({e}); caching in-process only")
+        return None
+    print(f"Unknown SHARED_CACHE_URL scheme: {url}; caching in-process only")
+    return None
+
+
+class SharedCache:
+    """The L2 tier shared by every worker, plus namespace generations for invalidating across them.
+
+    Values are stored as JSON (orjson) next to the time they were produced, under a hash of
+    (format, namespace, generation, key). Invalidating a namespace bumps its generation, so
+    every entry written under the old one stops matching at once, in every worker, without
+    scanning anything; old entries just expire. Workers pick up generation changes at most
+    SHARED_CACHE_SYNC_SECONDS late and run the registered listeners for them, so per-process
+    state (pooled clients, credentials) can be dropped too.
+
+    Backend errors are logged and treated as misses: the shared tier is never required to serve a request.
+    """
+
+    def __init__(self, backend=None, sync_seconds: float = SHARED_CACHE_SYNC_SECONDS):
+        self.backend = backend
+        self.sync_seconds = sync_seconds
+        self._generations: Dict[str, int] = {}
+        self._synced_at = 0.0
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"l2_hits": 0, "l2_misses": 0, "l2_writes": 0, "l2_errors": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Calls `listener(namespace)` whenever a namespace is invalidated, here or in another worker."""
+        self._listeners.append(listener)
+
+    def generation(self, namespace: Optional[str]) -> int:
+        if namespace is None:
+            return 0
+        if self.enabled and time.monotonic() - self._synced_at > self.sync_seconds:
+            self.sync()
+        return self._generations.get(namespace, 0)
+
+    def sync(self) -> None:
+        """Pulls generation changes made by other workers and notifies listeners."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if time.monotonic() - self._synced_at <= self.sync_seconds / 2:
+                return
+            self._synced_at = time.monotonic()
+            try:
+                latest = self.backend.generations()
+            except Exception as e:
+                self._error("sync", e)
+                return
+            changed = [namespace for namespace, generation in latest.items() if generation > self._generations.get(namespace, 0)]
+            self._generations.update({namespace: latest[namespace] for namespace in changed})
+        # On the first sync every known namespace counts as changed; dropping state nobody has built yet is harmless
+        self._notify(changed)
+
+    def invalidate(self, namespace: str) -> None:
+        """Retires everything cached under `namespace`, in this worker now and in the others on their next sync."""
+        generation = self._generations.get(namespace, 0) + 1
+        if self.enabled:
+            try:
+                generation = self.backend.bump(namespace)
+            except Exception as e:
+                self._error("invalidate", e)
+        with self._lock:
+            self._generations[namespace] = max(generation, self._generations.get(namespace, 0) + 1)
+            self._stats["invalidations"] += 1
+        self._notify([namespace])
+
+    def _notify(self, namespaces: List[str]) -> None:
+        for namespace in namespaces:
+            for listener in self._listeners:
+                try:
+                    listener(namespace)
+                except Exception as e:
+                    print(f"Shared cache listener failed for {namespace}: {e}")
+
+    def _key(self, cache: str, namespace: Optional[str], generation: int, key: Any) -> Optional[str]:
+        try:
+            raw = orjson.dumps([SHARED_CACHE_FORMAT, namespace, generation, key])
+        except TypeError:
+            # Keys that can't be serialized stay in-process
+            return None
+        return f"{cache}:{hashlib.sha256(raw).hexdigest()}"
+
+    def get(self, cache: str, key: Any, namespace: Optional[str] = None, generation: Optional[int] = None) -> Optional[Tuple[Any, float]]:
+        """(value, age in seconds) from the shared tier, or None."""
+        if not self.enabled:
+            return None
+        shared_key = self._key(cache, namespace, self.generation(namespace) if generation is None else generation, key)
+        if shared_key is None:
+            return None
+        try:
+            blob = self.backend.get(shared_key)
+            if blob is None:
+                self._count("l2_misses")
+                return None
+            stored_at, value = orjson.loads(blob)
+        except Exception as e:
+            self._error("get", e)
+            return None
+        self._count("l2_hits")
+        return value, max(0.0, time.time() - stored_at)
+
+    def set(self, cache: str, key: Any, value: Any, ttl: float, namespace: Optional[str] = None, generation: Optional[int] = None) -> None:
+        if not self.enabled or ttl <= 0:
+            return
+        shared_key = self._key(cache, namespace, self.generation(namespace) if generation is None else generation, key)
+        if shared_key is None:
+            return
+        try:
+            self.backend.set(shared_key, orjson.dumps([time.time(), value]), ttl)
+            self._count("l2_writes")
+        except Exception as e:
+            self._error("set", e)
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            self._stats[field] += 1
+
+    def _error(self, operation: str, error: Exception) -> None:
+        self._count("l2_errors")
+        print(f"Shared cache {operation} failed: {error}")
+
+    def start(self) -> None:
+        """Starts the loop that picks up other workers' invalidations even while this one is idle."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shared-cache-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_seconds):
+            self.sync()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = type(self.backend).__name__ if self.backend else "none"
+        stats["namespaces"] = len(self._generations)
+        return stats
+
+
+shared_cache = SharedCache(backend_from_url(SHARED_CACHE_URL))
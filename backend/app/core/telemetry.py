@@ -0,0 +1,306 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Add a Server-Timing header (per-request breakdown: db, ga4_data, google_oauth, ...) to every response
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+# When set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Latency buckets in seconds: sub-millisecond DB hits up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last)], sum, count
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Process-wide metrics in the Prometheus text format.
+
+    Collectors are callbacks run at scrape time, for numbers that already live
+    elsewhere (cache stats, pool sizes). They return (name, help, type, [(labels, value)]).
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        blocks = [metric.render() for metric in self._metrics]
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, help, kind, samples in families:
+                lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+                blocks.append("\n".join(lines))
+        return "\n".join(blocks) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status")))
+HTTP_LATENCY = registry.register(Histogram("http_request_duration_seconds", "Time to produce the response.", ("method", "route")))
+HTTP_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "HTTP requests being handled right now."))
+UPSTREAM_LATENCY = registry.register(Histogram("upstream_request_duration_seconds", "Calls to Google APIs (and waits for their quota).", ("service", "operation", "outcome")))
+UPSTREAM_IN_FLIGHT = registry.register(Gauge("upstream_requests_in_flight", "Upstream calls in progress.", ("service",)))
+DB_LATENCY = registry.register(Histogram("db_query_duration_seconds", "SQL statement execution time.", ("engine",)))
+
+
+class RequestTimings:
+    """Time spent per component during one request, for the Server-Timing header."""
+
+    def __init__(self):
+        self._totals: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, component: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._totals.setdefault(component, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self, total_seconds: float) -> str:
+        with self._lock:
+            parts = [f'{name};dur={seconds * 1000:.1f};desc="{count} calls"' for name, (seconds, count) in self._totals.items()]
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Set by the middleware; run_in_threadpool and SQLAlchemy's async bridge both carry it along
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def span(service: str, operation: str):
+    """Times one upstream call: `with span("ga4_data", "batch_run_reports"): ...`."""
+    started = time.perf_counter()
+    outcome = "ok"
+    UPSTREAM_IN_FLIGHT.inc(service=service)
+    try:
+        yield
+    except Exception as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_IN_FLIGHT.dec(service=service)
+        UPSTREAM_LATENCY.observe(elapsed, service=service, operation=operation, outcome=outcome)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(service, elapsed)
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Times every statement run through a (sync) SQLAlchemy engine. For async engines pass `.sync_engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_LATENCY.observe(elapsed, engine=name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add("db", elapsed)
+
+
+def cache_collector(caches: Dict[str, object]) -> Callable:
+    """Exposes TTLCache.stats() for each named cache."""
+
+    def collect():
+        stats = {name: cache.stats() for name, cache in caches.items()}
+        families = []
+        for field, kind, help in (
+            ("hits", "counter", "Fresh cache hits."),
+            ("stale_hits", "counter", "Stale entries served while refreshing."),
+            ("misses", "counter", "Cache misses (loader called)."),
+            ("coalesced", "counter", "Misses that joined a load already in flight."),
+            ("shared_hits", "counter", "Misses answered from the shared (cross-worker) tier."),
+            ("evictions", "counter", "Entries evicted for space."),
+            ("size", "gauge", "Entries currently cached."),
+            ("hit_ratio", "gauge", "Share of lookups answered from the cache."),
+        ):
+            name = f"cache_{field}" + ("_total" if kind == "counter" else "")
+            families.append((name, help, kind, [({"cache": cache}, values.get(field, 0)) for cache, values in stats.items()]))
+        return families
+
+    return collect
+
+
+def _route_label(scope) -> str:
+    """The matched route as a template (path params put back as {name}), so ids don't explode the series count."""
+    if scope.get("route") is None:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+class TelemetryMiddleware:
+    """Records per-route latency, status counts and in-flight requests; optionally adds Server-Timing."""
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.header(time.perf_counter() - started).encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            _current_timings.reset(token)
+            route = _route_label(scope)
+            elapsed = time.perf_counter() - started
+            HTTP_LATENCY.observe(elapsed, method=scope["method"], route=route)
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
@@ -1,6 +1,8 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 load_dotenv() # Loads the variables from the .env file
@@ -8,9 +10,55 @@ load_dotenv() # Loads the variables from the .env file
 # Grabs the URL securely without exposing the password in the code
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Connection pool tuning (override in your .env). Sizes are per engine and per process.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+# Neon drops idle connections after ~5 minutes, so recycle before that happens
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "280"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def _pool_options(url) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    # SQLite (local dev) picks its own pool class, which doesn't take sizing arguments
+    if not url.drivername.startswith("sqlite"):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        )
+    return options
+
+
+def _async_url(url):
+    """Same database, async driver: asyncpg for Postgres, aiosqlite for SQLite."""
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        query = dict(url.query)
+        # asyncpg spells libpq's `sslmode` as `ssl` and doesn't know `channel_binding` (both in Neon URLs)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode:
+            query["ssl"] = sslmode
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    if url.drivername == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+_url = make_url(SQLALCHEMY_DATABASE_URL)
+
+# Sync engine: the worker, background tasks and token refreshes (all run on threads)
+engine = create_engine(_url, **_pool_options(_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: API routes, so a request waiting on the database doesn't hold a thread
+_async_db_url = _async_url(_url)
+async_engine = create_async_engine(_async_db_url, **_pool_options(_async_db_url))
+# expire_on_commit=False keeps loaded rows readable after commit without an implicit (sync) reload
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,4 +66,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Date, Float, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from datetime import datetime
@@ -24,6 +24,148 @@ class Integration(Base):
     provider = Column(String) # e.g., "google_analytics", "meta_ads"
     property_id = Column(String, nullable=True) # e.g., GA4 Property ID
     encrypted_credentials = Column(String) # The AES-256 encrypted JSON string
+    # Added after the first deploys: existing databases get these two from the guarded ALTER in migration 0002
+    properties_json = Column(Text, nullable=True) # Cached GA4 property catalogue (JSON list)
+    properties_synced_at = Column(DateTime, nullable=True) # When the catalogue was last pulled from the Admin API
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    owner = relationship("User", back_populates="integrations")
\ No newline at end of file
+    owner = relationship("User", back_populates="integrations")
+
+
+class GA4DailyMetric(Base):
+    """One day of GA4 traffic for a property, split by source / medium / campaign."""
+    __tablename__ = "ga4_daily_metrics"
+    __table_args__ = (
+        # Leading (property_id, date) columns also serve date-range scans for a property
+        UniqueConstraint("property_id", "date", "source", "medium", "campaign", name="uq_ga4_daily_metric"),
+        Index("ix_ga4_daily_metrics_property_source_date", "property_id", "source", "medium", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    property_id = Column(String, nullable=False) # e.g., "properties/12345"
+    date = Column(Date, nullable=False)
+    source = Column(String, nullable=False)
+    medium = Column(String, nullable=False)
+    campaign = Column(String, nullable=False)
+    sessions = Column(Integer, default=0)
+    active_users = Column(Integer, default=0)
+    page_views = Column(Integer, default=0)
+    key_events = Column(Float, default=0.0) # GA4 key events (formerly "conversions")
+    revenue = Column(Float, default=0.0) # totalRevenue, in the property's currency
+
+
+class SyncWatermark(Base):
+    """The last day the ingestion worker has pulled for a (property, report) pair."""
+    __tablename__ = "sync_watermarks"
+    __table_args__ = (
+        UniqueConstraint("property_id", "report", name="uq_sync_watermark"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    integration_id = Column(Integer, ForeignKey("integrations.id"))
+    property_id = Column(String, nullable=False)
+    report = Column(String, nullable=False) # e.g., "daily_traffic"
+    last_synced_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GA4DailyTotal(Base):
+    """One row per property per day: the fact table pre-summed over every channel.
+
+    A year of history is 365 rows per property, so any date range is a tiny index range scan.
+    """
+    __tablename__ = "ga4_daily_totals"
+
+    property_id = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+    sessions = Column(Integer, default=0)
+    active_users = Column(Integer, default=0) # Sum of daily active users
+    page_views = Column(Integer, default=0)
+
+
+class GA4Rollup(Base):
+    """Precomputed trailing 7/30/90-day totals ending on the latest synced day."""
+    __tablename__ = "ga4_rollups"
+
+    property_id = Column(String, primary_key=True)
+    window_days = Column(Integer, primary_key=True)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    sessions = Column(Integer, default=0)
+    active_users = Column(Integer, default=0)
+    page_views = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GA4MonthlyChannel(Base):
+    """Per-channel totals for one calendar month, so long date ranges sum a few rows per channel instead of every day."""
+    __tablename__ = "ga4_monthly_channels"
+
+    property_id = Column(String, primary_key=True)
+    month = Column(Date, primary_key=True) # First day of the month
+    source = Column(String, primary_key=True)
+    medium = Column(String, primary_key=True)
+    sessions = Column(Integer, default=0)
+    active_users = Column(Integer, default=0) # Sum of daily active users
+    page_views = Column(Integer, default=0)
+
+
+class TrafficAnomaly(Base):
+    """A day whose traffic broke from its expected level, found by the batch anomaly job."""
+    __tablename__ = "traffic_anomalies"
+    __table_args__ = (
+        UniqueConstraint("property_id", "date", "metric", name="uq_traffic_anomaly"),
+        Index("ix_traffic_anomalies_property_date", "property_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    property_id = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    metric = Column(String, nullable=False) # e.g., "sessions"
+    value = Column(Float, nullable=False)
+    expected = Column(Float, nullable=False) # Same-weekday baseline
+    z_score = Column(Float, nullable=False)
+    rolling_z_score = Column(Float, nullable=True)
+    direction = Column(String, nullable=False) # "drop" or "spike"
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TrafficForecastModel(Base):
+    """Fitted Holt-Winters state for one property's daily metric, advanced day by day by the forecast job."""
+    __tablename__ = "traffic_forecast_models"
+
+    property_id = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True) # e.g., "sessions"
+    alpha = Column(Float, nullable=False) # Level smoothing
+    beta = Column(Float, nullable=False) # Trend smoothing
+    gamma = Column(Float, nullable=False) # Weekly seasonal smoothing
+    level = Column(Float, nullable=False)
+    trend = Column(Float, nullable=False)
+    season = Column(Text, nullable=False) # JSON list of 7 weekday offsets, Monday first
+    sse = Column(Float, nullable=False) # Sum of squared one-step errors, for the interval width
+    observations = Column(Integer, nullable=False)
+    state_date = Column(Date, nullable=False) # Last day folded into the state
+    fitted_at = Column(DateTime, nullable=False) # Last full parameter search
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AdSpendDaily(Base):
+    """One day of spend for an ad campaign, from any ad platform (Google Ads, Meta Ads)."""
+    __tablename__ = "ad_spend_daily"
+    __table_args__ = (
+        UniqueConstraint("provider", "account_id", "date", "campaign_id", name="uq_ad_spend_daily"),
+        Index("ix_ad_spend_daily_integration_date", "integration_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    integration_id = Column(Integer, ForeignKey("integrations.id"), nullable=False)
+    provider = Column(String, nullable=False) # "google_ads" or "meta_ads"
+    account_id = Column(String, nullable=False) # Google Ads customer id / Meta ad account id
+    date = Column(Date, nullable=False)
+    campaign_id = Column(String, nullable=False)
+    campaign_name = Column(String, nullable=False)
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    spend = Column(Float, default=0.0) # In `currency`
+    currency = Column(String, nullable=True)
+    conversions = Column(Float, default=0.0)
@@ -1,14 +1,26 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.db.database import engine
-from app.db import models
+from app.core import telemetry
+from app.core.admission import AdmissionRejected, upstream_admission
+from app.core.cache import report_cache
+from app.core.shared_cache import shared_cache
+from app.core.compression import CompressionMiddleware
+from app.core.responses import FastJSONResponse
+from app.db.database import async_engine, engine
 from app.api import analytics, auth, integrations 
+from app.api.deps import principal_cache
+from app.services.google_clients import client_pool
+from app.services.realtime import realtime_hub
+from app.services.token_manager import token_manager
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Tables are managed by migrations (`alembic upgrade head`), not created at import time
 
-app = FastAPI(title="Marketing SaaS API")
+app = FastAPI(title="Marketing SaaS API", default_response_class=FastJSONResponse)
 
 # --- THE FIX: Explicitly list your frontend domains ---
 origins = [
@@ -25,11 +37,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Big JSON payloads (dashboard, portfolio, metrics) go out brotli/gzip-compressed
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so the recorded latency covers everything including compression
+app.add_middleware(telemetry.TelemetryMiddleware)
+
+# Per-query DB timings, for both the async (API) and sync (background) engines
+telemetry.instrument_engine(async_engine.sync_engine, "async")
+telemetry.instrument_engine(engine, "sync")
+telemetry.registry.add_collector(telemetry.cache_collector({"ga4_reports": report_cache, "principals": principal_cache}))
+telemetry.registry.add_collector(lambda: [("google_client_pool_size", "Credential owners with pooled Google API clients.", "gauge", [({}, len(client_pool))])])
+telemetry.registry.add_collector(lambda: [
+    ("realtime_feeds", "Properties with a live GA4 realtime poller.", "gauge", [({}, realtime_hub.stats()["feeds"])]),
+    ("realtime_viewers", "Open live dashboard streams.", "gauge", [({}, realtime_hub.stats()["viewers"])]),
+])
+telemetry.registry.add_collector(lambda: [
+    (f"shared_cache_{field}_total", f"Shared cache tier {field.replace('_', ' ')}.", "counter", [({"backend": stats["backend"]}, stats[field])])
+    for stats in [shared_cache.stats()]
+    for field in ("l2_hits", "l2_misses", "l2_writes", "l2_errors", "invalidations")
+])
+telemetry.registry.add_collector(lambda: [
+    ("admission_in_flight", "Requests holding an upstream slot.", "gauge", [({}, upstream_admission.stats()["in_flight"])]),
+    ("admission_queued", "Requests waiting for an upstream slot.", "gauge", [({}, upstream_admission.stats()["queued"])]),
+    ("admission_rejected_total", "Requests turned away by admission control.", "counter", [
+        ({"status": "429"}, upstream_admission.stats()["rejected_429"]),
+        ({"status": "503"}, upstream_admission.stats()["rejected_503"]),
+    ]),
+])
+
 # Register our API routes
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(integrations.router, prefix="/api/v1/integrations", tags=["Integrations"]) 
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, error: AdmissionRejected):
+    # Same shape as the GA4 quota response, so the dashboard shows a "try again shortly" state
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"data": {"status": "busy", "retry_after": error.retry_after, "message": f"{error.reason}. Please try again shortly."}},
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+_import_ms = (time.perf_counter() - _import_started) * 1000
+
+@app.on_event("startup")
+def report_startup_time():
+    # Watch this in the deploy logs; `python -m benchmarks.cold_start` breaks it down per module
+    print(f"Startup: app.main imported in {_import_ms:.0f} ms")
+
+@app.on_event("startup")
+def start_shared_cache_sync():
+    # Picks up other workers' invalidations (re-linked integrations) even while this one is idle
+    shared_cache.start()
+
+@app.on_event("startup")
+def start_token_refresher():
+    # Keep active integrations' Google tokens refreshed ahead of expiry
+    token_manager.start()
+
+@app.on_event("shutdown")
+def close_google_clients():
+    token_manager.stop()
+    shared_cache.stop()
+    # Close pooled gRPC channels cleanly instead of letting them die with the process
+    client_pool.close_all()
+
+@app.on_event("shutdown")
+async def close_database_pool():
+    await async_engine.dispose()
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint. Numbers are per process; scrape each worker."""
+    if telemetry.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {telemetry.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(telemetry.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the ArbFlow Marketing API"}
\ No newline at end of file
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+from datetime import date
+from typing import Iterator, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core import telemetry
+from app.core.retry import with_retries
+from app.core.security import vault
+from app.db.models import Integration
+
+# Ad platform HTTP knobs (override in your .env)
+ADS_HTTP_TIMEOUT_SECONDS = float(os.getenv("ADS_HTTP_TIMEOUT_SECONDS", "60"))
+ADS_HTTP_ATTEMPTS = int(os.getenv("ADS_HTTP_ATTEMPTS", "5"))
+ADS_HTTP_POOL_SIZE = int(os.getenv("ADS_HTTP_POOL_SIZE", "16"))
+
+
+class AdSpendRow(NamedTuple):
+    """One campaign-day of spend, normalised across ad platforms."""
+    account_id: str
+    date: date
+    campaign_id: str
+    campaign_name: str
+    impressions: int
+    clicks: int
+    spend: float # In the account's currency
+    currency: str
+    conversions: float
+
+
+class AdsApiError(Exception):
+    """An ad platform rejected a request."""
+
+    def __init__(self, provider: str, status: int, message: str, retry_after: Optional[int] = None):
+        super().__init__(f"{provider} API error {status}: {message}")
+        self.provider = provider
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RetryableAdsApiError(AdsApiError):
+    """Throttling or a server-side failure; retried with backoff (at least `retry_after` seconds)."""
+
+
+_session_local = threading.local()
+
+
+def _http_session() -> requests.Session:
+    # One keep-alive session per worker thread; requests.Session isn't safe to share across threads
+    session = getattr(_session_local, "session", None)
+    if session is None:
+        session = _session_local.session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=ADS_HTTP_POOL_SIZE, pool_maxsize=ADS_HTTP_POOL_SIZE))
+        session.mount("http://", HTTPAdapter(pool_connections=ADS_HTTP_POOL_SIZE, pool_maxsize=ADS_HTTP_POOL_SIZE))
+    return session
+
+
+def iter_json_array(response: requests.Response, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+    """Yields the elements of a top-level JSON array as they arrive, without reading the whole body first."""
+    decoder = json.JSONDecoder()
+    response.encoding = response.encoding or "utf-8"
+    buffer = ""
+    started = False
+    for chunk in response.iter_content(chunk_size=chunk_size, decode_unicode=True):
+        buffer += chunk
+        position = 0
+        while True:
+            # Skip the separators between elements
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if position >= len(buffer) or buffer[position] == "]":
+                break
+            try:
+                element, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element continues in the next chunk
+                break
+            yield element
+        buffer = buffer[position:]
+
+
+class AdsConnector:
+    """Shared plumbing for ad platform connectors: auth headers, retried HTTP calls and telemetry.
+
+    Subclasses set `provider`, implement `auth_headers`, `list_accounts` and `fetch_spend`,
+    and make every upstream call through `request`.
+    """
+
+    provider = ""
+
+    def __init__(self, integration: Integration):
+        self.integration = integration
+        self.credentials = vault.open(integration.encrypted_credentials)
+
+    def auth_headers(self) -> dict:
+        raise NotImplementedError
+
+    def list_accounts(self) -> List[str]:
+        """Ad account ids these credentials can read."""
+        raise NotImplementedError
+
+    def fetch_spend(self, account_id: str, start: date, end: date) -> Iterator[AdSpendRow]:
+        """Campaign-day spend for one account, paging through the platform's results."""
+        raise NotImplementedError
+
+    def request(self, method: str, url: str, operation: str, stream: bool = False, **kwargs) -> requests.Response:
+        """One upstream call, retried with backoff on throttling, 5xx and connection errors."""
+
+        def attempt() -> requests.Response:
+            with telemetry.span(self.provider, operation):
+                response = _http_session().request(
+                    method, url, headers=self.auth_headers(), timeout=ADS_HTTP_TIMEOUT_SECONDS, stream=stream, **kwargs
+                )
+            if response.status_code >= 400:
+                raise self.error_for(response)
+            return response
+
+        return with_retries(
+            attempt,
+            retry_on=(RetryableAdsApiError, requests.ConnectionError, requests.Timeout),
+            attempts=ADS_HTTP_ATTEMPTS,
+        )
+
+    def error_for(self, response: requests.Response) -> AdsApiError:
+        """Maps an error response to an AdsApiError; subclasses refine this with platform error codes."""
+        retry_after = response.headers.get("Retry-After")
+        retry_after = int(retry_after) if retry_after and retry_after.isdigit() else None
+        error_class = RetryableAdsApiError if response.status_code == 429 or response.status_code >= 500 else AdsApiError
+        return error_class(self.provider, response.status_code, response.text[:500], retry_after)
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.db.database import SessionLocal
+from app.db.models import AdSpendDaily, Integration, SyncWatermark
+from app.services.ads_connector import AdsConnector
+from app.services.google_ads import GoogleAdsConnector
+from app.services.meta_ads import MetaAdsConnector
+
+# Ad spend sync knobs (override in your .env)
+ADS_BACKFILL_DAYS = int(os.getenv("ADS_BACKFILL_DAYS", "90"))
+# Both platforms keep attributing conversions to past days, so every run re-pulls this many days
+ADS_REFETCH_DAYS = int(os.getenv("ADS_REFETCH_DAYS", "7"))
+ADS_SYNC_CONCURRENCY = int(os.getenv("ADS_SYNC_CONCURRENCY", "8"))
+
+# Integration.provider -> connector
+AD_CONNECTORS: Dict[str, type] = {
+    GoogleAdsConnector.provider: GoogleAdsConnector,
+    MetaAdsConnector.provider: MetaAdsConnector,
+}
+AD_SPEND_REPORT = "ad_spend"
+
+
+def ads_sync_window(last_synced_date: Optional[date], today: date) -> Tuple[date, date]:
+    if last_synced_date is None:
+        return today - timedelta(days=ADS_BACKFILL_DAYS), today
+    return min(last_synced_date - timedelta(days=ADS_REFETCH_DAYS), today), today
+
+
+def _watermark_key(provider: str, account_id: str) -> str:
+    # Shares sync_watermarks with GA4, whose keys look like "properties/123"
+    return f"{provider}:{account_id}"
+
+
+def sync_account(connector: AdsConnector, account_id: str, today: Optional[date] = None) -> int:
+    """Pulls one ad account's campaign spend from its watermark up to today. Returns the rows written."""
+    today = today or date.today()
+    key = _watermark_key(connector.provider, account_id)
+    db = SessionLocal()
+    try:
+        watermark = db.query(SyncWatermark).filter(SyncWatermark.property_id == key, SyncWatermark.report == AD_SPEND_REPORT).first()
+        start, end = ads_sync_window(watermark.last_synced_date if watermark else None, today)
+
+        rows = list(connector.fetch_spend(account_id, start, end))
+
+        # Replace the whole window in one transaction so re-fetched days never double count
+        db.query(AdSpendDaily).filter(
+            AdSpendDaily.provider == connector.provider,
+            AdSpendDaily.account_id == account_id,
+            AdSpendDaily.date >= start,
+            AdSpendDaily.date <= end
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(AdSpendDaily, [
+            dict(row._asdict(), integration_id=connector.integration.id, provider=connector.provider)
+            for row in rows
+        ])
+
+        if watermark is None:
+            db.add(SyncWatermark(integration_id=connector.integration.id, property_id=key, report=AD_SPEND_REPORT, last_synced_date=end))
+        else:
+            watermark.integration_id = connector.integration.id
+            watermark.last_synced_date = end
+            # Re-pulls within the same day change no column, so mark the sync explicitly for readers keyed on it
+            watermark.updated_at = datetime.utcnow()
+
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _connectors() -> List[AdsConnector]:
+    db = SessionLocal()
+    try:
+        integrations = db.query(Integration).filter(Integration.provider.in_(list(AD_CONNECTORS))).all()
+    finally:
+        db.close()
+    return [AD_CONNECTORS[integration.provider](integration) for integration in integrations]
+
+
+def run_sync(concurrency: int = ADS_SYNC_CONCURRENCY) -> dict:
+    """Syncs spend for every ad account of every linked ad integration in one pass.
+
+    Account discovery and the per-account pulls both run on one pool of at most
+    `concurrency` threads, so the whole client book syncs in parallel without flooding either platform.
+    """
+    connectors = _connectors()
+    summary = {"integrations": len(connectors), "accounts": 0, "rows": 0, "failed": []}
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ads-sync") as pool:
+        targets, seen = [], set()
+        for connector, accounts in zip(connectors, pool.map(_accounts_or_none, connectors)):
+            for account_id in accounts or []:
+                # An account reachable from two logins is only pulled once
+                if (connector.provider, account_id) not in seen:
+                    seen.add((connector.provider, account_id))
+                    targets.append((connector, account_id))
+            if accounts is None:
+                summary["failed"].append(f"{connector.provider}:integration/{connector.integration.id}")
+        summary["accounts"] = len(targets)
+
+        futures = {pool.submit(sync_account, connector, account_id): _watermark_key(connector.provider, account_id) for connector, account_id in targets}
+        for future, key in futures.items():
+            try:
+                summary["rows"] += future.result()
+            except Exception as e:
+                print(f"Ad spend sync failed for {key}: {e}")
+                summary["failed"].append(key)
+
+    return summary
+
+
+def _accounts_or_none(connector: AdsConnector) -> Optional[List[str]]:
+    try:
+        return connector.list_accounts()
+    except Exception as e:
+        print(f"Skipping {connector.provider} integration {connector.integration.id}, could not list accounts: {e}")
+        return None
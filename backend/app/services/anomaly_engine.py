@@ -0,0 +1,188 @@
+import os
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.db.models import GA4DailyTotal, TrafficAnomaly
+from app.services.metrics_store import SETTLE_DAYS
+
+# Anomaly tuning knobs (override in your .env)
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+# Ignore statistically "significant" moves smaller than this, e.g. 3 sessions vs 1
+ANOMALY_MIN_CHANGE = float(os.getenv("ANOMALY_MIN_CHANGE", "0.2"))
+ANOMALY_HISTORY_DAYS = 120
+ANOMALY_LOOKBACK_DAYS = 7
+ROLLING_WINDOW_DAYS = 28
+SEASONAL_WEEKS = 6
+MIN_ROLLING_OBSERVATIONS = 14
+MIN_SEASONAL_OBSERVATIONS = 3
+
+
+def load_series_matrix(db: Session, metric: str = "sessions", days: int = ANOMALY_HISTORY_DAYS, end: Optional[date] = None) -> Tuple[List[str], List[date], np.ndarray]:
+    """Loads every property's daily series into one (properties x days) matrix.
+
+    Days before a property's first synced day are NaN. Gaps after it are zero-traffic days.
+    """
+    end = end or db.query(func.max(GA4DailyTotal.date)).scalar()
+    if end is None:
+        return [], [], np.empty((0, 0))
+    start = end - timedelta(days=days - 1)
+
+    column = getattr(GA4DailyTotal, metric)
+    rows = db.query(GA4DailyTotal.property_id, GA4DailyTotal.date, column).filter(
+        GA4DailyTotal.date >= start,
+        GA4DailyTotal.date <= end
+    ).all()
+
+    property_ids = sorted({row[0] for row in rows})
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    matrix = np.full((len(property_ids), days), np.nan)
+    if rows:
+        property_index = {property_id: i for i, property_id in enumerate(property_ids)}
+        p_idx = np.fromiter((property_index[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+        d_idx = np.fromiter(((row[1] - start).days for row in rows), dtype=np.intp, count=len(rows))
+        matrix[p_idx, d_idx] = np.fromiter((row[2] or 0 for row in rows), dtype=float, count=len(rows))
+
+        observed = np.maximum.accumulate(~np.isnan(matrix), axis=1)
+        matrix[observed & np.isnan(matrix)] = 0.0
+
+    return property_ids, dates, matrix
+
+
+def _rolling_stats(matrix: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and std of the `window` days before each day (the day itself excluded), via cumulative sums."""
+    valid = ~np.isnan(matrix)
+    values = np.where(valid, matrix, 0.0)
+    zeros = np.zeros((matrix.shape[0], 1))
+    sums = np.concatenate([zeros, np.cumsum(values, axis=1)], axis=1)
+    squares = np.concatenate([zeros, np.cumsum(values ** 2, axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+
+    hi = np.arange(matrix.shape[1])
+    lo = np.clip(hi - window, 0, None)
+    n = counts[:, hi] - counts[:, lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (sums[:, hi] - sums[:, lo]) / n
+        variance = (squares[:, hi] - squares[:, lo]) / n - mean ** 2
+    std = np.sqrt(np.clip(variance, 0, None))
+
+    too_few = n < MIN_ROLLING_OBSERVATIONS
+    mean[too_few] = np.nan
+    std[too_few] = np.nan
+    return mean, std
+
+
+def _seasonal_stats(matrix: np.ndarray, weeks: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and std of the same weekday over the previous `weeks` weeks."""
+    same_weekday = np.full((weeks,) + matrix.shape, np.nan)
+    for k in range(1, weeks + 1):
+        lag = 7 * k
+        if lag < matrix.shape[1]:
+            same_weekday[k - 1, :, lag:] = matrix[:, :-lag]
+
+    n = np.sum(~np.isnan(same_weekday), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = np.nansum(same_weekday, axis=0)
+        mean = total / n
+        std = np.sqrt(np.clip(np.nansum(same_weekday ** 2, axis=0) / n - mean ** 2, 0, None))
+
+    too_few = n < MIN_SEASONAL_OBSERVATIONS
+    mean[too_few] = np.nan
+    std[too_few] = np.nan
+    return mean, std
+
+
+def score_matrix(matrix: np.ndarray) -> dict:
+    """Scores every (property, day) cell at once.
+
+    The expected value is the same-weekday baseline, or the 28-day rolling mean when
+    there is not enough weekday history yet. The z-score scale is the matching std,
+    floored at the Poisson noise level so quiet properties don't alert on noise.
+    """
+    rolling_mean, rolling_std = _rolling_stats(matrix, ROLLING_WINDOW_DAYS)
+    seasonal_mean, seasonal_std = _seasonal_stats(matrix, SEASONAL_WEEKS)
+
+    use_rolling = np.isnan(seasonal_mean)
+    expected = np.where(use_rolling, rolling_mean, seasonal_mean)
+    spread = np.where(use_rolling, rolling_std, seasonal_std)
+    poisson_floor = np.sqrt(np.clip(np.nan_to_num(expected), 0, None))
+    scale = np.fmax(np.fmax(spread, poisson_floor), 1.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (matrix - expected) / scale
+        rolling_z = (matrix - rolling_mean) / np.fmax(rolling_std, 1.0)
+        relative_change = np.abs(matrix - expected) / np.fmax(expected, 1.0)
+
+    return {"expected": expected, "z": z, "rolling_z": rolling_z, "relative_change": relative_change}
+
+
+def detect_anomalies(db: Session, metric: str = "sessions", lookback_days: int = ANOMALY_LOOKBACK_DAYS, end: Optional[date] = None) -> int:
+    """Batch job: scores every property's recent settled days and replaces the stored anomalies for them."""
+    # Ingestion syncs through today, and a partial day reads as a sharp drop; only settled days are scored
+    settled_end = date.today() - timedelta(days=SETTLE_DAYS)
+    end = min(end or settled_end, settled_end)
+    latest = db.query(func.max(GA4DailyTotal.date)).scalar()
+    if latest is None:
+        return 0
+    property_ids, dates, matrix = load_series_matrix(db, metric, end=min(end, latest))
+    if not property_ids:
+        return 0
+
+    scores = score_matrix(matrix)
+    lookback = slice(max(0, len(dates) - lookback_days), len(dates))
+    z = scores["z"][:, lookback]
+    flagged = (
+        (np.abs(z) >= ANOMALY_Z_THRESHOLD)
+        & (scores["relative_change"][:, lookback] >= ANOMALY_MIN_CHANGE)
+        & ~np.isnan(z)
+    )
+
+    # Also clears anything stored for days that haven't settled yet
+    db.query(TrafficAnomaly).filter(
+        TrafficAnomaly.metric == metric,
+        or_(
+            (TrafficAnomaly.date >= dates[lookback.start]) & (TrafficAnomaly.date <= dates[-1]),
+            TrafficAnomaly.date > settled_end
+        )
+    ).delete(synchronize_session=False)
+
+    p_idx, d_idx = np.nonzero(flagged)
+    d_idx = d_idx + lookback.start
+    db.bulk_insert_mappings(TrafficAnomaly, [
+        {
+            "property_id": property_ids[p],
+            "date": dates[d],
+            "metric": metric,
+            "value": float(matrix[p, d]),
+            "expected": float(scores["expected"][p, d]),
+            "z_score": float(scores["z"][p, d]),
+            "rolling_z_score": None if np.isnan(scores["rolling_z"][p, d]) else float(scores["rolling_z"][p, d]),
+            "direction": "drop" if matrix[p, d] < scores["expected"][p, d] else "spike",
+        }
+        for p, d in zip(p_idx.tolist(), d_idx.tolist())
+    ])
+    db.commit()
+    return len(p_idx)
+
+
+def latest_anomaly(db: Session, property_id: str, within_days: int = 3) -> dict:
+    """The dashboard's `anomaly` block: the most recent stored anomaly for the property, if any."""
+    since = date.today() - timedelta(days=within_days)
+    anomaly = db.query(TrafficAnomaly).filter(
+        TrafficAnomaly.property_id == property_id,
+        TrafficAnomaly.date >= since
+    ).order_by(TrafficAnomaly.date.desc()).first()
+
+    if anomaly is None:
+        return {"is_anomaly": False, "message": ""}
+
+    change = abs(anomaly.value - anomaly.expected) / max(anomaly.expected, 1.0) * 100
+    weekday = anomaly.date.strftime("%A")
+    if anomaly.direction == "drop":
+        message = f"Urgent: {anomaly.metric.capitalize()} dropped by {change:.1f}% on {anomaly.date.isoformat()} compared to a typical {weekday}. Check active campaigns immediately."
+    else:
+        message = f"{anomaly.metric.capitalize()} spiked {change:.1f}% above a typical {weekday} on {anomaly.date.isoformat()}."
+    return {"is_anomaly": True, "message": message, "date": anomaly.date.isoformat(), "direction": anomaly.direction}
@@ -0,0 +1,58 @@
+import os
+
+from sqlalchemy import select, update
+
+from app.core.security import vault
+from app.db.database import SessionLocal
+from app.db.models import Integration
+
+# Rows re-encrypted per transaction (override in your .env)
+ROTATION_BATCH_SIZE = int(os.getenv("KEY_ROTATION_BATCH_SIZE", "200"))
+
+
+def rotate_credentials(batch_size: int = ROTATION_BATCH_SIZE) -> dict:
+    """Re-encrypts every integration's credentials with the newest key in ENCRYPTION_KEYS.
+
+    Walks the table in id order one batch at a time (keyset pagination), with a short
+    transaction per batch, so neither the whole table nor a long-lived lock is ever held.
+    Each row is only overwritten if it still holds the ciphertext we read. A token
+    refresh that lands in the meantime wins, and it is already sealed with the new key.
+    Plaintext rows from before the vault get encrypted on the way.
+    """
+    summary = {"scanned": 0, "rotated": 0, "skipped": 0, "failed": 0}
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            batch = db.execute(
+                select(Integration.id, Integration.encrypted_credentials)
+                .where(Integration.id > last_id)
+                .order_by(Integration.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                break
+
+            for integration_id, stored in batch:
+                summary["scanned"] += 1
+                try:
+                    rotated = vault.rotate(stored)
+                except Exception as e:
+                    # Sealed with a key that is no longer configured: leave it for a human
+                    print(f"Could not re-encrypt integration {integration_id}: {type(e).__name__}")
+                    summary["failed"] += 1
+                    continue
+                if rotated is None:
+                    continue
+                result = db.execute(
+                    update(Integration)
+                    .where(Integration.id == integration_id, Integration.encrypted_credentials == stored)
+                    .values(encrypted_credentials=rotated)
+                )
+                summary["rotated" if result.rowcount else "skipped"] += 1
+
+            db.commit()
+            last_id = batch[-1][0]
+    finally:
+        db.close()
+    return summary
@@ -0,0 +1,232 @@
+import json
+import os
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import GA4DailyTotal, TrafficForecastModel
+from app.services import metrics_store
+from app.services.anomaly_engine import load_series_matrix
+from app.services.metrics_store import SETTLE_DAYS
+
+# Forecasting knobs (override in your .env)
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "182"))
+# Smoothing parameters are re-searched this often; in between, the stored state only rolls forward
+FORECAST_REFIT_DAYS = int(os.getenv("FORECAST_REFIT_DAYS", "7"))
+FORECAST_HORIZON_DAYS = int(os.getenv("FORECAST_HORIZON_DAYS", "14"))
+FORECAST_INTERVAL = float(os.getenv("FORECAST_INTERVAL", "0.95"))
+FORECAST_MAX_HORIZON_DAYS = 90
+FORECAST_METRICS = ("sessions", "active_users", "page_views")
+SEASON_DAYS = 7
+MIN_FIT_DAYS = 4 * SEASON_DAYS
+
+# Candidate (alpha, beta, gamma) triples, kept to beta <= alpha and gamma <= 1 - alpha so the model stays stable
+PARAMETER_GRID = np.array([
+    (alpha, beta, gamma)
+    for alpha in (0.05, 0.1, 0.2, 0.35, 0.5, 0.7)
+    for beta in (0.0, 0.01, 0.05)
+    for gamma in (0.01, 0.05, 0.15, 0.3)
+    if beta <= alpha and gamma <= 1 - alpha
+])
+
+
+def _smooth(values: np.ndarray, weekdays: np.ndarray, alpha, beta, gamma, level, trend, season, first: np.ndarray, last: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Runs additive Holt-Winters (ETS(A,A,A), error-correction form) over days first..last of each row.
+
+    One pass over the days, vectorized across rows and, when the parameters carry a leading
+    axis, across every parameter candidate at once. Rows outside their range are left as they are.
+    Returns the end level, trend and season plus each row's sum of squared one-step errors and their count.
+    """
+    level, trend, season = level.copy(), trend.copy(), season.copy()
+    sse = np.zeros(level.shape)
+    count = np.zeros(level.shape[-1], dtype=int)
+    for t in range(max(int(first.min()), 0), min(int(last.max()), values.shape[1] - 1) + 1):
+        active = (first <= t) & (t <= last)
+        weekday = weekdays[t]
+        # A missing day inside a row's range had no traffic
+        error = np.where(active, np.nan_to_num(values[:, t]) - (level + trend + season[..., weekday]), 0.0)
+        level = level + np.where(active, trend, 0.0) + alpha * error
+        trend = trend + beta * error
+        season[..., weekday] += gamma * error
+        sse += error ** 2
+        count += active
+    return level, trend, season, sse, count
+
+
+def _initial_state(values: np.ndarray, weekdays: np.ndarray, first: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Level, trend and weekday offsets at the end of each row's first two weeks, from their weekly means."""
+    rows = np.arange(len(values))
+    positions = first[:, None] + np.arange(2 * SEASON_DAYS)
+    weeks = values[rows[:, None], positions].reshape(len(values), 2, SEASON_DAYS)
+    means = weeks.mean(axis=2)
+    trend = (means[:, 1] - means[:, 0]) / SEASON_DAYS
+    # A week's mean sits mid-week, three days before its end
+    level = means[:, 1] + 3 * trend
+    season = np.empty((len(values), SEASON_DAYS))
+    season[rows[:, None], weekdays[positions[:, :SEASON_DAYS]]] = (weeks - means[:, :, None]).mean(axis=1)
+    return level, trend, season
+
+
+def fit_models(values: np.ndarray, weekdays: np.ndarray, first: np.ndarray, last: np.ndarray) -> dict:
+    """Grid-searches the smoothing parameters for every row at once and keeps each row's best one-step fit."""
+    level, trend, season = _initial_state(values, weekdays, first)
+    candidates = len(PARAMETER_GRID)
+    alpha, beta, gamma = (PARAMETER_GRID[:, k, None] for k in range(3))
+    level, trend, season, sse, count = _smooth(
+        values, weekdays, alpha, beta, gamma,
+        np.repeat(level[None], candidates, axis=0),
+        np.repeat(trend[None], candidates, axis=0),
+        np.repeat(season[None], candidates, axis=0),
+        first + 2 * SEASON_DAYS, last,
+    )
+    best = np.argmin(sse, axis=0)
+    rows = np.arange(len(values))
+    return {
+        "alpha": PARAMETER_GRID[best, 0],
+        "beta": PARAMETER_GRID[best, 1],
+        "gamma": PARAMETER_GRID[best, 2],
+        "level": level[best, rows],
+        "trend": trend[best, rows],
+        "season": season[best, rows],
+        "sse": sse[best, rows],
+        "observations": count,
+    }
+
+
+def update_forecasts(db: Session, metric: str = "sessions", now: Optional[datetime] = None) -> dict:
+    """Batch job: brings every property's stored model up to its latest settled day.
+
+    New properties and models older than FORECAST_REFIT_DAYS are refit from the history window;
+    the rest only fold in the days that settled since the last run. Both paths run over all
+    properties at once.
+    """
+    now = now or datetime.utcnow()
+    latest = dict(db.query(GA4DailyTotal.property_id, func.max(GA4DailyTotal.date)).group_by(GA4DailyTotal.property_id).all())
+    summary = {"properties": len(latest), "refit": 0, "updated": 0}
+    if not latest:
+        return summary
+
+    settled = {property_id: day - timedelta(days=SETTLE_DAYS) for property_id, day in latest.items()}
+    end = max(settled.values())
+    models = {model.property_id: model for model in db.query(TrafficForecastModel).filter(TrafficForecastModel.metric == metric)}
+    refit_before = now - timedelta(days=FORECAST_REFIT_DAYS)
+    history_start = end - timedelta(days=FORECAST_HISTORY_DAYS - 1)
+
+    def is_current(model: Optional[TrafficForecastModel]) -> bool:
+        return model is not None and model.fitted_at > refit_before and model.state_date >= history_start
+
+    # Rolling forward only needs the days since the oldest state, not the whole history
+    days = FORECAST_HISTORY_DAYS
+    if all(is_current(models.get(property_id)) for property_id in latest):
+        days = (end - min(models[property_id].state_date for property_id in latest)).days
+        if days <= 0:
+            return summary
+
+    property_ids, dates, matrix = load_series_matrix(db, metric, days=days, end=end)
+    if not property_ids:
+        return summary
+
+    # Days a property hasn't settled yet are unknown, not zero
+    last = np.array([(settled[property_id] - dates[0]).days for property_id in property_ids])
+    matrix[np.arange(len(dates))[None, :] > last[:, None]] = np.nan
+    seen = ~np.isnan(matrix)
+    first = np.where(seen.any(axis=1), np.argmax(seen, axis=1), len(dates))
+    weekdays = np.array([day.weekday() for day in dates])
+
+    refit: List[int] = []
+    roll: List[int] = []
+    for i, property_id in enumerate(property_ids):
+        model = models.get(property_id)
+        if is_current(model):
+            if (model.state_date - dates[0]).days < last[i]:
+                roll.append(i)
+        elif last[i] - first[i] + 1 >= MIN_FIT_DAYS:
+            refit.append(i)
+
+    if refit:
+        rows = np.array(refit)
+        fitted = fit_models(matrix[rows], weekdays, first[rows], last[rows])
+        for j, i in enumerate(refit):
+            model = models.get(property_ids[i])
+            if model is None:
+                model = TrafficForecastModel(property_id=property_ids[i], metric=metric)
+                db.add(model)
+            model.alpha, model.beta, model.gamma = (float(fitted[key][j]) for key in ("alpha", "beta", "gamma"))
+            model.level, model.trend = float(fitted["level"][j]), float(fitted["trend"][j])
+            model.season = json.dumps([round(float(value), 4) for value in fitted["season"][j]])
+            model.sse, model.observations = float(fitted["sse"][j]), int(fitted["observations"][j])
+            model.state_date = dates[last[i]]
+            model.fitted_at = now
+
+    if roll:
+        rows = np.array(roll)
+        current = [models[property_ids[i]] for i in roll]
+        level, trend, season, sse, count = _smooth(
+            matrix[rows], weekdays,
+            np.array([model.alpha for model in current]),
+            np.array([model.beta for model in current]),
+            np.array([model.gamma for model in current]),
+            np.array([model.level for model in current]),
+            np.array([model.trend for model in current]),
+            np.array([json.loads(model.season) for model in current]),
+            np.array([(model.state_date - dates[0]).days + 1 for model in current]),
+            last[rows],
+        )
+        for j, (i, model) in enumerate(zip(roll, current)):
+            model.level, model.trend = float(level[j]), float(trend[j])
+            model.season = json.dumps([round(float(value), 4) for value in season[j]])
+            model.sse += float(sse[j])
+            model.observations += int(count[j])
+            model.state_date = dates[last[i]]
+
+    db.commit()
+    summary["refit"], summary["updated"] = len(refit), len(roll)
+    return summary
+
+
+def forecast(db: Session, property_id: str, metric: str = "sessions", days: int = FORECAST_HORIZON_DAYS) -> Optional[dict]:
+    """The next `days` days after the latest synced day, with FORECAST_INTERVAL prediction intervals, from the stored model."""
+    model = db.get(TrafficForecastModel, (property_id, metric))
+    if model is None:
+        return None
+
+    # The state stops before the unsettled days, so those are stepped over first
+    latest = metrics_store.latest_synced_date(db, property_id) or model.state_date
+    skip = max((latest - model.state_date).days, 0)
+    steps = np.arange(1, skip + days + 1)
+    season = np.array(json.loads(model.season))
+    mean = model.level + steps * model.trend + season[(model.state_date.weekday() + steps) % SEASON_DAYS]
+
+    # h-step variance of ETS(A,A,A): sigma^2 * (1 + sum over j < h of (alpha + beta*j + gamma*[j is a whole season])^2)
+    lags = steps[:-1]
+    weights = model.alpha + model.beta * lags + model.gamma * (lags % SEASON_DAYS == 0)
+    variance_factor = 1 + np.concatenate([[0.0], np.cumsum(weights ** 2)])
+    sigma = np.sqrt(model.sse / model.observations) if model.observations else 0.0
+    half_width = NormalDist().inv_cdf(0.5 + FORECAST_INTERVAL / 2) * sigma * np.sqrt(variance_factor)
+
+    points = [
+        {
+            "date": (model.state_date + timedelta(days=int(step))).isoformat(),
+            "value": max(0, round(float(value))),
+            "lower": max(0, round(float(value - width))),
+            "upper": max(0, round(float(value + width))),
+        }
+        for step, value, width in zip(steps[skip:], mean[skip:], half_width[skip:])
+    ]
+    return {
+        "property_id": property_id,
+        "metric": metric,
+        "interval": FORECAST_INTERVAL,
+        "model": {
+            "alpha": model.alpha,
+            "beta": model.beta,
+            "gamma": model.gamma,
+            "state_date": model.state_date.isoformat(),
+            "fitted_at": model.fitted_at.isoformat(),
+        },
+        "points": points,
+    }
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from app.core import telemetry
+from app.core.cache import in_background_refresh, resolve_date_range
+from app.services.quota_scheduler import Priority, QuotaExhaustedError, quota_scheduler
+
+# The GA4 SDK is imported inside the functions that need it so app startup doesn't pay for it
+if TYPE_CHECKING:
+    from google.analytics.data_v1beta import BetaAnalyticsDataClient
+    from google.analytics.data_v1beta.types import RunReportRequest
+
+# GA4 accepts at most 5 reports per batchRunReports call
+MAX_REPORTS_PER_BATCH = 5
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """Everything needed to describe one GA4 report, independent of the property it runs on."""
+    name: str
+    metrics: Tuple[str, ...]
+    dimensions: Tuple[str, ...] = ()
+    start_date: str = "30daysAgo"
+    end_date: str = "today"
+    limit: int = 0
+    offset: int = 0
+
+    def to_request(self, property_id: str = None) -> "RunReportRequest":
+        from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest
+
+        request = RunReportRequest(
+            dimensions=[Dimension(name=name) for name in self.dimensions],
+            metrics=[Metric(name=name) for name in self.metrics],
+            date_ranges=[DateRange(start_date=self.start_date, end_date=self.end_date)],
+            # Ask GA4 to report quota usage so the scheduler can pace itself
+            return_property_quota=True,
+        )
+        if property_id:
+            request.property = property_id
+        if self.limit:
+            request.limit = self.limit
+        if self.offset:
+            request.offset = self.offset
+        return request
+
+    def cache_key(self) -> tuple:
+        """Hashable identity of the spec, with relative dates rounded to the day."""
+        return (self.dimensions, self.metrics, resolve_date_range(self.start_date, self.end_date), self.limit, self.offset)
+
+
+class ReportRow(NamedTuple):
+    dimensions: Tuple[str, ...]
+    metrics: Tuple[Union[int, float], ...]
+
+
+@dataclass
+class ReportResult:
+    """A parsed GA4 report: header names plus rows whose metric values are already int/float."""
+    name: str
+    dimension_headers: List[str]
+    metric_headers: List[str]
+    rows: List[ReportRow]
+    row_count: int
+
+    def metric_index(self, name: str) -> int:
+        return self.metric_headers.index(name)
+
+
+def parse_report(name: str, response) -> ReportResult:
+    """Converts a RunReportResponse into a ReportResult."""
+    from google.analytics.data_v1beta.types import MetricType
+
+    integer_columns = [header.type_ == MetricType.TYPE_INTEGER for header in response.metric_headers]
+    rows = []
+    for row in response.rows:
+        metrics = tuple(
+            int(value.value) if is_int else float(value.value)
+            for value, is_int in zip(row.metric_values, integer_columns)
+        )
+        rows.append(ReportRow(tuple(value.value for value in row.dimension_values), metrics))
+
+    return ReportResult(
+        name=name,
+        dimension_headers=[header.name for header in response.dimension_headers],
+        metric_headers=[header.name for header in response.metric_headers],
+        rows=rows,
+        row_count=response.row_count,
+    )
+
+
+def _scheduled_call(property_id: str, reports: int, priority: Priority, call: Callable, operation: str = "run_report"):
+    """Runs one upstream Data API call through the quota scheduler."""
+    from google.api_core import exceptions as google_exceptions
+
+    with telemetry.span("ga4_quota_wait", priority.name.lower()):
+        quota_scheduler.acquire(property_id, reports, priority)
+    try:
+        with telemetry.span("ga4_data", operation):
+            return call()
+    except google_exceptions.ResourceExhausted as e:
+        raise QuotaExhaustedError(property_id, quota_scheduler.exhausted(property_id)) from e
+
+
+def _run_batch(client: "BetaAnalyticsDataClient", property_id: str, specs: Sequence[ReportSpec], timeout: Optional[float] = None, priority: Priority = Priority.INTERACTIVE) -> List[ReportResult]:
+    # Only override the client's default deadline when the caller asked for one
+    call_options = {"timeout": timeout} if timeout else {}
+    if len(specs) == 1:
+        response = _scheduled_call(property_id, 1, priority, lambda: client.run_report(specs[0].to_request(property_id), **call_options))
+        quota_scheduler.observe(property_id, response.property_quota)
+        return [parse_report(specs[0].name, response)]
+
+    from google.analytics.data_v1beta.types import BatchRunReportsRequest
+
+    batch_request = BatchRunReportsRequest(
+        property=property_id,
+        requests=[spec.to_request() for spec in specs],
+    )
+    batch_response = _scheduled_call(property_id, len(specs), priority, lambda: client.batch_run_reports(batch_request, **call_options), operation="batch_run_reports")
+    for report in batch_response.reports:
+        quota_scheduler.observe(property_id, report.property_quota)
+    return [parse_report(spec.name, report) for spec, report in zip(specs, batch_response.reports)]
+
+
+def run_reports(client: "BetaAnalyticsDataClient", property_id: str, specs: Sequence[ReportSpec], timeout: Optional[float] = None, priority: Priority = Priority.INTERACTIVE) -> Dict[str, ReportResult]:
+    """Runs several reports for one property in as few upstream round trips as possible.
+
+    Up to 5 specs go out as a single batchRunReports call. Larger sets are split
+    into batches that run at the same time, so the wall-clock cost stays one round trip.
+    `timeout` (seconds) is passed to every upstream call. Every call waits its turn in the
+    quota scheduler and raises QuotaExhaustedError when the property is out of quota.
+    """
+    # Cache refreshes reuse the interactive loaders, but nobody is waiting on them
+    if in_background_refresh():
+        priority = Priority.BACKGROUND
+    batches = [specs[i:i + MAX_REPORTS_PER_BATCH] for i in range(0, len(specs), MAX_REPORTS_PER_BATCH)]
+
+    if len(batches) <= 1:
+        results = _run_batch(client, property_id, specs, timeout, priority) if specs else []
+    else:
+        with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+            results = [
+                result
+                for batch_results in pool.map(lambda batch: _run_batch(client, property_id, batch, timeout, priority), batches)
+                for result in batch_results
+            ]
+
+    return {result.name: result for result in results}
+
+
+def iter_report_pages(client: "BetaAnalyticsDataClient", property_id: str, spec: ReportSpec, page_size: int = 100000, priority: Priority = Priority.INTERACTIVE) -> Iterator[ReportResult]:
+    """Pages through a large report with limit/offset, yielding one parsed page at a time."""
+    offset = 0
+    while True:
+        page_spec = replace(spec, limit=page_size, offset=offset)
+        response = _scheduled_call(property_id, 1, priority, lambda: client.run_report(page_spec.to_request(property_id)))
+        quota_scheduler.observe(property_id, response.property_quota)
+        page = parse_report(spec.name, response)
+        yield page
+        offset += len(page.rows)
+        if not page.rows or offset >= page.row_count:
+            return
+
+
+def run_realtime_report(client: "BetaAnalyticsDataClient", property_id: str, spec: ReportSpec) -> ReportResult:
+    """Runs a realtime report (roughly the last 30 minutes). The spec's date range is ignored.
+
+    Realtime requests draw on GA4's separate realtime quota, so they skip the core quota scheduler.
+    """
+    from google.analytics.data_v1beta.types import Dimension, Metric, RunRealtimeReportRequest
+
+    request = RunRealtimeReportRequest(
+        property=property_id,
+        dimensions=[Dimension(name=name) for name in spec.dimensions],
+        metrics=[Metric(name=name) for name in spec.metrics],
+    )
+    if spec.limit:
+        request.limit = spec.limit
+    with telemetry.span("ga4_data", "run_realtime_report"):
+        response = client.run_realtime_report(request)
+    return parse_report(spec.name, response)
@@ -0,0 +1,98 @@
+import os
+from datetime import date
+from typing import Iterator, List
+
+from app.services.ads_connector import AdsConnector, AdSpendRow, iter_json_array
+from app.services.token_manager import token_manager
+
+# Google Ads API settings (override in your .env). Point the endpoint at benchmarks/fake_ads.py to test locally.
+GOOGLE_ADS_API_ENDPOINT = os.getenv("GOOGLE_ADS_API_ENDPOINT", "https://googleads.googleapis.com/v17").rstrip("/")
+GOOGLE_ADS_DEVELOPER_TOKEN = os.getenv("GOOGLE_ADS_DEVELOPER_TOKEN", "")
+# Fallback manager (MCC) account for integrations linked without one of their own
+GOOGLE_ADS_LOGIN_CUSTOMER_ID = os.getenv("GOOGLE_ADS_LOGIN_CUSTOMER_ID")
+
+# Manager accounts hold no campaigns and reject metric queries, so only client accounts are synced
+CUSTOMER_QUERY = "SELECT customer.id, customer.manager FROM customer"
+CLIENT_ACCOUNTS_QUERY = """
+    SELECT customer_client.id, customer_client.manager, customer_client.status
+    FROM customer_client
+    WHERE customer_client.manager = FALSE AND customer_client.status = 'ENABLED'
+"""
+
+CAMPAIGN_SPEND_QUERY = """
+    SELECT customer.id, customer.currency_code, campaign.id, campaign.name, segments.date,
+           metrics.impressions, metrics.clicks, metrics.cost_micros, metrics.conversions
+    FROM campaign
+    WHERE segments.date BETWEEN '{start}' AND '{end}' AND metrics.impressions > 0
+"""
+
+
+class GoogleAdsConnector(AdsConnector):
+    """Google Ads over REST. Spend comes from `googleAds:searchStream`, which sends every row in one
+    streamed response that is parsed batch by batch as it arrives, with no page tokens.
+
+    Auth reuses the token manager, so the Google login's access token is refreshed and
+    persisted the same way as for GA4. An integration linked through a manager account
+    carries its own `login_customer_id`; its accounts are that manager's client accounts.
+    """
+
+    provider = "google_ads"
+
+    @property
+    def login_customer_id(self) -> str:
+        return self.credentials.get("login_customer_id") or GOOGLE_ADS_LOGIN_CUSTOMER_ID
+
+    def auth_headers(self) -> dict:
+        credentials = token_manager.credentials_for(self.integration)
+        if not credentials.valid:
+            import google.auth.transport.requests
+            credentials.refresh(google.auth.transport.requests.Request())
+        headers = {"Authorization": f"Bearer {credentials.token}", "developer-token": GOOGLE_ADS_DEVELOPER_TOKEN}
+        if self.login_customer_id:
+            headers["login-customer-id"] = self.login_customer_id
+        return headers
+
+    def search(self, customer_id: str, query: str) -> Iterator[dict]:
+        """Rows of one GAQL query, parsed batch by batch as the searchStream response arrives."""
+        response = self.request(
+            "POST",
+            f"{GOOGLE_ADS_API_ENDPOINT}/customers/{customer_id}/googleAds:searchStream",
+            "search_stream",
+            stream=True,
+            json={"query": query},
+        )
+        with response:
+            for batch in iter_json_array(response):
+                yield from batch.get("results", [])
+
+    def list_accounts(self) -> List[str]:
+        if self.login_customer_id:
+            # Client accounts under the manager; the manager itself comes back with manager = TRUE and is filtered out
+            return [str(row["customerClient"]["id"]) for row in self.search(self.login_customer_id, CLIENT_ACCOUNTS_QUERY)]
+
+        response = self.request("GET", f"{GOOGLE_ADS_API_ENDPOINT}/customers:listAccessibleCustomers", "list_accessible_customers")
+        accounts = []
+        for name in response.json().get("resourceNames", []):
+            customer_id = name.split("/", 1)[1]
+            # Proto3 JSON leaves `manager` out when it is false
+            if not any(row.get("customer", {}).get("manager", False) for row in self.search(customer_id, CUSTOMER_QUERY)):
+                accounts.append(customer_id)
+        return accounts
+
+    def fetch_spend(self, account_id: str, start: date, end: date) -> Iterator[AdSpendRow]:
+        query = CAMPAIGN_SPEND_QUERY.format(start=start.isoformat(), end=end.isoformat())
+        for result in self.search(account_id, query):
+            customer, campaign = result.get("customer", {}), result.get("campaign", {})
+            metrics = result.get("metrics", {})
+            # int64 fields arrive as strings; cost is in millionths of the account currency
+            yield AdSpendRow(
+                account_id=account_id,
+                date=date.fromisoformat(result["segments"]["date"]),
+                campaign_id=str(campaign.get("id", "")),
+                campaign_name=campaign.get("name", "(not set)"),
+                impressions=int(metrics.get("impressions", 0)),
+                clicks=int(metrics.get("clicks", 0)),
+                spend=int(metrics.get("costMicros", 0)) / 1_000_000,
+                currency=customer.get("currencyCode", ""),
+                conversions=float(metrics.get("conversions", 0)),
+            )
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable
+
+from app.core.shared_cache import shared_cache
+from app.db.models import Integration
+from app.services.token_manager import integration_namespace, token_manager
+
+if TYPE_CHECKING:
+    from google.analytics.admin import AnalyticsAdminServiceClient
+    from google.analytics.data_v1beta import BetaAnalyticsDataClient
+
+# Pool tuning knobs (override in your .env)
+CLIENT_POOL_MAX_SIZE = int(os.getenv("GOOGLE_CLIENT_POOL_MAX_SIZE", "256"))
+CLIENT_POOL_IDLE_SECONDS = int(os.getenv("GOOGLE_CLIENT_POOL_IDLE_SECONDS", "1800"))
+# Evicted clients stay open this long so requests already using them can finish
+CLIENT_CLOSE_GRACE_SECONDS = 30
+# Point the clients at another server, e.g. the stand-in in benchmarks/fake_google.py.
+# Setting an endpoint switches that client to the REST transport.
+GA4_DATA_API_ENDPOINT = os.getenv("GA4_DATA_API_ENDPOINT")
+GA4_ADMIN_API_ENDPOINT = os.getenv("GA4_ADMIN_API_ENDPOINT")
+_ENDPOINTS = {"data": GA4_DATA_API_ENDPOINT, "admin": GA4_ADMIN_API_ENDPOINT}
+
+
+def _client_class(kind: str):
+    # The GA4 SDKs take ~0.5s to import, so they load when the first client is built, not at startup
+    if kind == "data":
+        from google.analytics.data_v1beta import BetaAnalyticsDataClient
+        return BetaAnalyticsDataClient
+    if kind == "admin":
+        from google.analytics.admin import AnalyticsAdminServiceClient
+        return AnalyticsAdminServiceClient
+    raise ValueError(f"Unknown Google client kind: {kind}")
+
+
+def _build_client(kind: str, credentials):
+    endpoint = _ENDPOINTS.get(kind)
+    if endpoint:
+        return _client_class(kind)(credentials=credentials, transport="rest", client_options={"api_endpoint": endpoint})
+    return _client_class(kind)(credentials=credentials)
+
+
+class _PoolEntry:
+    __slots__ = ("credentials", "clients", "last_used")
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self.clients = {}
+        self.last_used = time.monotonic()
+
+
+def _close_clients(clients) -> None:
+    for client in clients:
+        try:
+            client.transport.close()
+        except Exception as e:
+            print(f"Error closing Google API client: {e}")
+
+
+class GoogleClientPool:
+    """Process-wide pool of warm Google API clients, one set per credential owner.
+
+    Google's gRPC clients are thread-safe, so a single client per integration is
+    shared by every request thread. Entries are evicted least-recently-used once the
+    pool is full, or after sitting idle.
+    """
+
+    def __init__(self, max_size: int = CLIENT_POOL_MAX_SIZE, idle_seconds: int = CLIENT_POOL_IDLE_SECONDS):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._entries: "OrderedDict[Hashable, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, kind: str, credentials_factory: Callable):
+        """Returns a pooled client of `kind` ("data" or "admin") for `key`.
+
+        `credentials_factory` is only called when the key is not pooled yet.
+        """
+        retired = []
+        with self._lock:
+            self._sweep_idle(retired)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PoolEntry(credentials_factory())
+                while len(self._entries) > self.max_size:
+                    _, evicted = self._entries.popitem(last=False)
+                    retired.extend(evicted.clients.values())
+            self._entries.move_to_end(key)
+            entry.last_used = time.monotonic()
+
+            client = entry.clients.get(kind)
+            if client is None:
+                client = entry.clients[kind] = _build_client(kind, entry.credentials)
+
+        self._retire(retired)
+        return client
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drops the pooled clients for `key`, e.g. after its credentials were re-linked."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._retire(list(entry.clients.values()))
+
+    def close_all(self) -> None:
+        """Closes every pooled channel immediately. Called on application shutdown."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            _close_clients(entry.clients.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sweep_idle(self, retired: list) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.last_used >= cutoff:
+                break
+            del self._entries[key]
+            retired.extend(entry.clients.values())
+
+    def _retire(self, clients: list) -> None:
+        if clients:
+            timer = threading.Timer(CLIENT_CLOSE_GRACE_SECONDS, _close_clients, args=(clients,))
+            timer.daemon = True
+            timer.start()
+
+
+client_pool = GoogleClientPool()
+
+
+def integration_key(integration_id: int) -> tuple:
+    return ("integration", integration_id)
+
+
+def _forget_integration(namespace: str) -> None:
+    # Re-linked here or in another worker: pooled clients and credentials still hold the old tokens
+    kind, _, integration_id = namespace.partition(":")
+    if kind == "integration" and integration_id.isdigit():
+        token_manager.forget(int(integration_id))
+        client_pool.invalidate(integration_key(int(integration_id)))
+
+
+shared_cache.add_listener(_forget_integration)
+
+
+def data_client_for(integration: Integration) -> "BetaAnalyticsDataClient":
+    """Pooled GA4 Data API client for a user's OAuth integration."""
+    # Always go through the token manager so it can schedule a refresh-ahead
+    credentials = token_manager.credentials_for(integration)
+    return client_pool.get(integration_key(integration.id), "data", lambda: credentials)
+
+
+def admin_client_for(integration: Integration) -> "AnalyticsAdminServiceClient":
+    """Pooled GA4 Admin API client for a user's OAuth integration."""
+    credentials = token_manager.credentials_for(integration)
+    return client_pool.get(integration_key(integration.id), "admin", lambda: credentials)
@@ -0,0 +1,34 @@
+from google.oauth2.credentials import Credentials
+
+from app.core import telemetry
+from app.services.token_manager import TokenManager, expiring_soon
+
+
+class ManagedCredentials(Credentials):
+    """OAuth credentials that serialize refreshes per integration and persist the result.
+
+    Every refresh, whether the token manager triggers it ahead of time or the Google
+    client library triggers it inline, goes through here. The new access token is
+    written back to `Integration.encrypted_credentials`.
+
+    `stored_refresh_token` is the refresh token the row held when these credentials were
+    loaded (or last persisted); the write-back compares against it.
+    """
+
+    def __init__(self, integration_id: int, manager: "TokenManager", **kwargs):
+        super().__init__(**kwargs)
+        self._integration_id = integration_id
+        self._manager = manager
+        self.stored_refresh_token = self.refresh_token
+
+    def refresh(self, request):
+        with self._manager.lock_for(self._integration_id):
+            # Another thread may have refreshed while we waited for the lock
+            if self.valid and not expiring_soon(self):
+                return
+            # With several workers, one of the others has usually refreshed it already
+            if self._manager.adopt_shared_token(self._integration_id, self):
+                return
+            with telemetry.span("google_oauth", "refresh"):
+                super().refresh(request)
+            self._manager.persist(self._integration_id, self)
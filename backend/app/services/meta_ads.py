@@ -0,0 +1,103 @@
+import json
+import os
+import time
+from datetime import date
+from typing import Iterator, List
+
+import requests
+
+from app.core.config import META_GRAPH_API_ENDPOINT
+from app.services.ads_connector import AdsApiError, AdsConnector, AdSpendRow, RetryableAdsApiError
+
+# Meta Marketing API settings (override in your .env). The Graph endpoint lives in app.core.config.
+META_REPORT_POLL_SECONDS = float(os.getenv("META_REPORT_POLL_SECONDS", "2"))
+META_REPORT_TIMEOUT_SECONDS = float(os.getenv("META_REPORT_TIMEOUT_SECONDS", "900"))
+META_PAGE_SIZE = int(os.getenv("META_PAGE_SIZE", "500"))
+# Action types counted as conversions
+META_CONVERSION_ACTIONS = set(os.getenv("META_CONVERSION_ACTIONS", "purchase,lead,complete_registration").split(","))
+
+# Graph API error codes for throttling and temporary failures
+# https://developers.facebook.com/docs/graph-api/overview/rate-limiting
+META_RETRYABLE_CODES = {1, 2, 4, 17, 32, 341, 613, 80000, 80003, 80004, 80014}
+
+INSIGHTS_FIELDS = "campaign_id,campaign_name,impressions,clicks,spend,actions,account_currency"
+
+
+class MetaReportFailed(AdsApiError):
+    """An async insights job failed, was skipped, or never finished."""
+
+
+class MetaAdsConnector(AdsConnector):
+    """Meta Marketing API. Spend comes from asynchronous insights jobs: start a job per ad account,
+    poll it until it completes, then page through the results with cursors.
+
+    Async jobs are Meta's recommended path for large date ranges and many campaigns.
+    Synchronous insights calls time out on big accounts.
+    """
+
+    provider = "meta_ads"
+
+    def auth_headers(self) -> dict:
+        # Long-lived user or system-user token stored when the account was linked
+        return {"Authorization": f"Bearer {self.credentials.get('access_token')}"}
+
+    def error_for(self, response: requests.Response) -> AdsApiError:
+        try:
+            error = response.json().get("error", {})
+        except ValueError:
+            return super().error_for(response)
+        if error.get("code") in META_RETRYABLE_CODES or error.get("is_transient"):
+            return RetryableAdsApiError(self.provider, response.status_code, error.get("message", ""))
+        return super().error_for(response)
+
+    def _paged(self, url: str, operation: str, params: dict) -> Iterator[dict]:
+        """Follows `paging.next` cursors until the last page."""
+        while url:
+            body = self.request("GET", url, operation, params=params).json()
+            yield from body.get("data", [])
+            url = body.get("paging", {}).get("next")
+            # The `next` URL already carries every parameter
+            params = None
+
+    def list_accounts(self) -> List[str]:
+        accounts = self._paged(f"{META_GRAPH_API_ENDPOINT}/me/adaccounts", "list_ad_accounts", {"fields": "account_id", "limit": META_PAGE_SIZE})
+        return [account["account_id"] for account in accounts]
+
+    def _run_insights_job(self, account_id: str, start: date, end: date) -> str:
+        """Starts an async insights job and waits for it. Returns the report run id."""
+        started = self.request("POST", f"{META_GRAPH_API_ENDPOINT}/act_{account_id}/insights", "start_insights_job", data={
+            "level": "campaign",
+            "time_increment": 1,
+            "time_range": json.dumps({"since": start.isoformat(), "until": end.isoformat()}),
+            "fields": INSIGHTS_FIELDS,
+        }).json()
+        report_run_id = started["report_run_id"]
+
+        deadline = time.monotonic() + META_REPORT_TIMEOUT_SECONDS
+        while True:
+            job = self.request("GET", f"{META_GRAPH_API_ENDPOINT}/{report_run_id}", "poll_insights_job", params={"fields": "async_status,async_percent_completion"}).json()
+            status = job.get("async_status")
+            if status == "Job Completed":
+                return report_run_id
+            if status in ("Job Failed", "Job Skipped"):
+                raise MetaReportFailed(self.provider, 500, f"Insights job {report_run_id} for act_{account_id}: {status}")
+            if time.monotonic() > deadline:
+                raise MetaReportFailed(self.provider, 504, f"Insights job {report_run_id} for act_{account_id} did not finish in time")
+            time.sleep(META_REPORT_POLL_SECONDS)
+
+    def fetch_spend(self, account_id: str, start: date, end: date) -> Iterator[AdSpendRow]:
+        report_run_id = self._run_insights_job(account_id, start, end)
+        for row in self._paged(f"{META_GRAPH_API_ENDPOINT}/{report_run_id}/insights", "read_insights", {"limit": META_PAGE_SIZE}):
+            conversions = sum(float(action.get("value", 0)) for action in row.get("actions", []) if action.get("action_type") in META_CONVERSION_ACTIONS)
+            # Numbers arrive as strings; spend is in the account currency's major unit
+            yield AdSpendRow(
+                account_id=account_id,
+                date=date.fromisoformat(row["date_start"]),
+                campaign_id=str(row.get("campaign_id", "")),
+                campaign_name=row.get("campaign_name", "(not set)"),
+                impressions=int(row.get("impressions", 0)),
+                clicks=int(row.get("clicks", 0)),
+                spend=float(row.get("spend", 0)),
+                currency=row.get("account_currency", ""),
+                conversions=conversions,
+            )
@@ -0,0 +1,226 @@
+import os
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+from app.db.models import GA4DailyMetric, GA4DailyTotal, GA4MonthlyChannel, GA4Rollup
+
+# GA4 keeps revising the last couple of days, so ingestion re-pulls this many days behind the watermark (override in your .env).
+# Lives here rather than in ga4_ingestion so readers of the store don't import the Google SDK.
+INGEST_REFETCH_DAYS = int(os.getenv("GA4_INGEST_REFETCH_DAYS", "3"))
+# Days the ingestion worker may still revise, today's partial day included; models and alerts only read days older than this
+SETTLE_DAYS = INGEST_REFETCH_DAYS + 1
+ROLLUP_WINDOWS = (7, 30, 90)
+TOP_CHANNELS_LIMIT = 25
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def refresh_aggregates(db: Session, property_id: str, start: date, end: date) -> None:
+    """Rebuilds daily totals for [start, end] and the monthly channel totals of the months it touches
+    from the fact table, then the trailing rollups.
+
+    Called by the ingestion worker in the same transaction as the fact rows it wrote.
+    """
+    db.flush()
+    db.query(GA4DailyTotal).filter(
+        GA4DailyTotal.property_id == property_id,
+        GA4DailyTotal.date >= start,
+        GA4DailyTotal.date <= end
+    ).delete(synchronize_session=False)
+
+    daily_rows = db.query(
+        GA4DailyMetric.date,
+        func.sum(GA4DailyMetric.sessions),
+        func.sum(GA4DailyMetric.active_users),
+        func.sum(GA4DailyMetric.page_views),
+    ).filter(
+        GA4DailyMetric.property_id == property_id,
+        GA4DailyMetric.date >= start,
+        GA4DailyMetric.date <= end
+    ).group_by(GA4DailyMetric.date).all()
+
+    db.bulk_insert_mappings(GA4DailyTotal, [
+        {"property_id": property_id, "date": day, "sessions": sessions or 0, "active_users": users or 0, "page_views": views or 0}
+        for day, sessions, users, views in daily_rows
+    ])
+    _refresh_monthly_channels(db, property_id, start.replace(day=1), end.replace(day=1))
+    db.flush()
+
+    latest = db.query(func.max(GA4DailyTotal.date)).filter(GA4DailyTotal.property_id == property_id).scalar()
+    if latest is None:
+        return
+
+    for window_days in ROLLUP_WINDOWS:
+        window_start = latest - timedelta(days=window_days - 1)
+        totals = _sum_totals(db, property_id, window_start, latest)
+        rollup = db.get(GA4Rollup, (property_id, window_days))
+        if rollup is None:
+            rollup = GA4Rollup(property_id=property_id, window_days=window_days)
+            db.add(rollup)
+        rollup.start_date = window_start
+        rollup.end_date = latest
+        rollup.sessions = totals["sessions"]
+        rollup.active_users = totals["active_users"]
+        rollup.page_views = totals["page_views"]
+
+
+def _refresh_monthly_channels(db: Session, property_id: str, first_month: date, last_month: date) -> None:
+    """Re-sums whole months, since a partial re-pull can't be applied to a month total on its own."""
+    db.query(GA4MonthlyChannel).filter(
+        GA4MonthlyChannel.property_id == property_id,
+        GA4MonthlyChannel.month >= first_month,
+        GA4MonthlyChannel.month <= last_month
+    ).delete(synchronize_session=False)
+
+    rows = db.query(
+        GA4DailyMetric.date,
+        GA4DailyMetric.source,
+        GA4DailyMetric.medium,
+        func.sum(GA4DailyMetric.sessions),
+        func.sum(GA4DailyMetric.active_users),
+        func.sum(GA4DailyMetric.page_views),
+    ).filter(
+        GA4DailyMetric.property_id == property_id,
+        GA4DailyMetric.date >= first_month,
+        GA4DailyMetric.date < _next_month(last_month)
+    ).group_by(GA4DailyMetric.date, GA4DailyMetric.source, GA4DailyMetric.medium).all()
+
+    # Bucketed here rather than in SQL, which has no portable "start of month"
+    months = {}
+    for day, source, medium, sessions, users, views in rows:
+        totals = months.setdefault((day.replace(day=1), source, medium), [0, 0, 0])
+        totals[0] += sessions or 0
+        totals[1] += users or 0
+        totals[2] += views or 0
+    db.bulk_insert_mappings(GA4MonthlyChannel, [
+        {"property_id": property_id, "month": month, "source": source, "medium": medium, "sessions": sessions, "active_users": users, "page_views": views}
+        for (month, source, medium), (sessions, users, views) in months.items()
+    ])
+
+
+def _sum_totals(db: Session, property_id: str, start: date, end: date) -> dict:
+    sessions, users, views = db.query(
+        func.coalesce(func.sum(GA4DailyTotal.sessions), 0),
+        func.coalesce(func.sum(GA4DailyTotal.active_users), 0),
+        func.coalesce(func.sum(GA4DailyTotal.page_views), 0),
+    ).filter(
+        GA4DailyTotal.property_id == property_id,
+        GA4DailyTotal.date >= start,
+        GA4DailyTotal.date <= end
+    ).one()
+    return {"sessions": int(sessions), "active_users": int(users), "page_views": int(views)}
+
+
+def range_totals(db: Session, property_id: str, start: date, end: date) -> dict:
+    """Totals for any date range, answered from a precomputed rollup when the range matches one."""
+    window_days = (end - start).days + 1
+    if window_days in ROLLUP_WINDOWS:
+        rollup = db.get(GA4Rollup, (property_id, window_days))
+        if rollup is not None and rollup.start_date == start and rollup.end_date == end:
+            return {"sessions": rollup.sessions, "active_users": rollup.active_users, "page_views": rollup.page_views}
+    return _sum_totals(db, property_id, start, end)
+
+
+def daily_series(db: Session, property_id: str, start: date, end: date) -> list:
+    rows = db.query(GA4DailyTotal).filter(
+        GA4DailyTotal.property_id == property_id,
+        GA4DailyTotal.date >= start,
+        GA4DailyTotal.date <= end
+    ).order_by(GA4DailyTotal.date).all()
+    return [
+        {"date": row.date.isoformat(), "sessions": row.sessions, "active_users": row.active_users, "page_views": row.page_views}
+        for row in rows
+    ]
+
+
+def _daily_channel_rows(property_id: str, start: date, end: date):
+    return select(
+        GA4DailyMetric.source, GA4DailyMetric.medium, GA4DailyMetric.sessions, GA4DailyMetric.active_users, GA4DailyMetric.page_views
+    ).where(
+        GA4DailyMetric.property_id == property_id,
+        GA4DailyMetric.date >= start,
+        GA4DailyMetric.date <= end
+    )
+
+
+def channel_breakdown(db: Session, property_id: str, start: date, end: date, limit: int = TOP_CHANNELS_LIMIT) -> list:
+    """Top channels over any date range: whole months come from the monthly totals, only the partial
+    months at either end from the fact table, so the cost stays flat however long the range is."""
+    first_month = start if start.day == 1 else _next_month(start)
+    # Months before this one are covered entirely by the range
+    months_end = _next_month(end) if _next_month(end) - timedelta(days=1) == end else end.replace(day=1)
+
+    if first_month >= months_end:
+        parts = [_daily_channel_rows(property_id, start, end)]
+    else:
+        parts = [
+            select(
+                GA4MonthlyChannel.source, GA4MonthlyChannel.medium, GA4MonthlyChannel.sessions, GA4MonthlyChannel.active_users, GA4MonthlyChannel.page_views
+            ).where(
+                GA4MonthlyChannel.property_id == property_id,
+                GA4MonthlyChannel.month >= first_month,
+                GA4MonthlyChannel.month < months_end
+            )
+        ]
+        if start < first_month:
+            parts.append(_daily_channel_rows(property_id, start, first_month - timedelta(days=1)))
+        if months_end <= end:
+            parts.append(_daily_channel_rows(property_id, months_end, end))
+
+    channels = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+    sessions = func.sum(channels.c.sessions).label("sessions")
+    rows = db.query(
+        channels.c.source,
+        channels.c.medium,
+        sessions,
+        func.sum(channels.c.active_users),
+        func.sum(channels.c.page_views),
+    ).group_by(channels.c.source, channels.c.medium).order_by(sessions.desc()).limit(limit).all()
+    return [
+        {"source": source, "medium": medium, "sessions": int(s or 0), "active_users": int(u or 0), "page_views": int(v or 0)}
+        for source, medium, s, u, v in rows
+    ]
+
+
+def _percent_change(current: int, previous: int) -> Optional[float]:
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def query_metrics(db: Session, property_id: str, start: date, end: date, compare: bool = False, include_channels: bool = True) -> dict:
+    """Everything the dashboard needs for an arbitrary date range, read from the local store."""
+    totals = range_totals(db, property_id, start, end)
+    result = {
+        "property_id": property_id,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "totals": totals,
+        "daily": daily_series(db, property_id, start, end),
+    }
+    if include_channels:
+        result["channels"] = channel_breakdown(db, property_id, start, end)
+
+    if compare:
+        # The previous period is the same number of days immediately before `start`
+        length = (end - start).days + 1
+        previous_end = start - timedelta(days=1)
+        previous_start = previous_end - timedelta(days=length - 1)
+        previous = range_totals(db, property_id, previous_start, previous_end)
+        result["comparison"] = {
+            "start_date": previous_start.isoformat(),
+            "end_date": previous_end.isoformat(),
+            "totals": previous,
+            "change_percent": {key: _percent_change(totals[key], previous[key]) for key in totals},
+        }
+
+    return result
+
+
+def latest_synced_date(db: Session, property_id: str) -> Optional[date]:
+    return db.query(func.max(GA4DailyTotal.date)).filter(GA4DailyTotal.property_id == property_id).scalar()
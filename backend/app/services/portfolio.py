@@ -0,0 +1,43 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, List
+
+# Fan-out tuning knobs (override in your .env)
+PORTFOLIO_MAX_CONCURRENCY = int(os.getenv("PORTFOLIO_MAX_CONCURRENCY", "8"))
+PORTFOLIO_PROPERTY_TIMEOUT_SECONDS = float(os.getenv("PORTFOLIO_PROPERTY_TIMEOUT_SECONDS", "10"))
+# Hard ceiling for the whole request, however many properties the agency has
+PORTFOLIO_TOTAL_TIMEOUT_SECONDS = float(os.getenv("PORTFOLIO_TOTAL_TIMEOUT_SECONDS", "45"))
+
+
+def fan_out(properties_list: List[dict], fetch: Callable[[str], dict], max_concurrency: int = PORTFOLIO_MAX_CONCURRENCY, total_timeout: float = PORTFOLIO_TOTAL_TIMEOUT_SECONDS) -> List[dict]:
+    """Calls `fetch(property_id)` for every property with at most `max_concurrency` in flight.
+
+    Returns one entry per property in the original order. A property that raised or did
+    not finish before `total_timeout` gets `"status": "error"`, `"quota_exhausted"` or
+    `"timeout"` instead of failing the whole response.
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="portfolio")
+    try:
+        # Each fetch runs in a copy of the caller's context so its upstream spans count toward this request
+        futures = [pool.submit(contextvars.copy_context().run, fetch, prop["id"]) for prop in properties_list]
+        wait(futures, timeout=total_timeout)
+
+        results = []
+        for prop, future in zip(properties_list, futures):
+            entry = {"id": prop["id"], "name": prop["name"]}
+            if not future.done():
+                future.cancel()
+                entry.update({"status": "timeout"})
+            elif getattr(future.exception(), "retry_after", None) is not None:
+                entry.update({"status": "quota_exhausted", "retry_after": future.exception().retry_after})
+            elif future.exception() is not None:
+                print(f"Portfolio fetch failed for {prop['id']}: {future.exception()}")
+                entry.update({"status": "error", "error": type(future.exception()).__name__})
+            else:
+                entry.update({"status": "ok", "summary": future.result()})
+            results.append(entry)
+        return results
+    finally:
+        # Don't hold the response hostage to stragglers; their own gRPC deadlines end them
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,89 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import telemetry
+from app.db.database import SessionLocal
+from app.db.models import Integration
+from app.services.google_clients import admin_client_for
+
+# How old the stored catalogue may get before a background resync is kicked off
+PROPERTY_CATALOGUE_MAX_AGE = timedelta(seconds=int(os.getenv("PROPERTY_CATALOGUE_MAX_AGE_SECONDS", "21600")))
+
+# Integration ids with a background resync already running
+_syncing = set()
+_syncing_lock = threading.Lock()
+
+
+def fetch_properties(admin_client) -> list:
+    """Walks every account and property the Google login can see via the Admin API."""
+    properties_list = []
+    # The pager fetches further pages lazily, so time the whole walk
+    with telemetry.span("ga4_admin", "list_account_summaries"):
+        for account in admin_client.list_account_summaries():
+            for prop in account.property_summaries:
+                properties_list.append({
+                    "id": prop.property, # Formatted as "properties/12345"
+                    "name": f"{account.display_name} - {prop.display_name}"
+                })
+    return properties_list
+
+
+def get_stored_properties(integration: Integration):
+    """Returns the stored catalogue, or None if it has never been synced."""
+    if integration.properties_json is None:
+        return None
+    return json.loads(integration.properties_json)
+
+
+def is_stale(integration: Integration) -> bool:
+    if integration.properties_synced_at is None:
+        return True
+    return datetime.utcnow() - integration.properties_synced_at > PROPERTY_CATALOGUE_MAX_AGE
+
+
+def _store_properties(integration: Integration, properties_list: list) -> None:
+    integration.properties_json = json.dumps(properties_list)
+    integration.properties_synced_at = datetime.utcnow()
+
+
+def sync_properties(db: Session, integration: Integration) -> list:
+    """Pulls the live property list from Google and stores it on the integration."""
+    properties_list = fetch_properties(admin_client_for(integration))
+    _store_properties(integration, properties_list)
+    db.commit()
+    return properties_list
+
+
+async def sync_properties_async(db: AsyncSession, integration: Integration) -> list:
+    """`sync_properties` for async routes: the Admin API walk runs on the threadpool."""
+    properties_list = await run_in_threadpool(lambda: fetch_properties(admin_client_for(integration)))
+    _store_properties(integration, properties_list)
+    await db.commit()
+    return properties_list
+
+
+def resync_in_background(integration_id: int) -> None:
+    """Refreshes one integration's catalogue with its own DB session. Safe to call from BackgroundTasks."""
+    with _syncing_lock:
+        if integration_id in _syncing:
+            return
+        _syncing.add(integration_id)
+
+    db = SessionLocal()
+    try:
+        integration = db.query(Integration).filter(Integration.id == integration_id).first()
+        if integration is None:
+            return
+        sync_properties(db, integration)
+    except Exception as e:
+        print(f"Property catalogue sync failed for integration {integration_id}: {e}")
+    finally:
+        db.close()
+        with _syncing_lock:
+            _syncing.discard(integration_id)
@@ -0,0 +1,164 @@
+import os
+import math
+import threading
+import time
+from enum import IntEnum
+from typing import Dict, Optional
+
+# GA4 standard-property quotas (override in your .env for GA4 360 properties)
+GA4_PROPERTY_TOKENS_PER_HOUR = int(os.getenv("GA4_PROPERTY_TOKENS_PER_HOUR", "40000"))
+GA4_PROJECT_TOKENS_PER_HOUR = int(os.getenv("GA4_PROJECT_TOKENS_PER_HOUR", "14000"))
+# Share of each bucket that background work (sync, exports) must leave for interactive requests
+BACKGROUND_RESERVE_FRACTION = float(os.getenv("GA4_BACKGROUND_RESERVE_FRACTION", "0.3"))
+# Typical cost of one report until GA4 tells us the real one
+DEFAULT_TOKENS_PER_REPORT = 10.0
+# How long callers are willing to queue for quota before giving up
+INTERACTIVE_MAX_WAIT_SECONDS = 2.0
+BACKGROUND_MAX_WAIT_SECONDS = 300.0
+# How long to back off a property after Google answered RESOURCE_EXHAUSTED
+EXHAUSTED_COOL_DOWN_SECONDS = 60
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0 # A user is waiting on the response
+    BACKGROUND = 1 # Ingestion, exports, cache refreshes
+
+
+class QuotaExhaustedError(Exception):
+    """GA4 quota for a property is used up. Retry after `retry_after` seconds; the integration itself is fine."""
+
+    def __init__(self, property_id: str, retry_after: int):
+        super().__init__(f"GA4 quota exhausted for {property_id}, retry in {retry_after}s")
+        self.property_id = property_id
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """A token bucket refilled continuously at `capacity` tokens per hour. Not thread-safe on its own."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.refill_per_second = capacity / 3600.0
+        self.level = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_for(self, cost: float, floor: float, now: float) -> float:
+        """Seconds until `cost` tokens can be taken while keeping `floor` tokens in the bucket."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        shortfall = cost + floor - self.level
+        if shortfall <= 0:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return math.inf
+        return shortfall / self.refill_per_second
+
+
+class _PropertyQuota:
+    def __init__(self):
+        self.property = TokenBucket(GA4_PROPERTY_TOKENS_PER_HOUR)
+        self.project = TokenBucket(GA4_PROJECT_TOKENS_PER_HOUR)
+        self.tokens_per_report = DEFAULT_TOKENS_PER_REPORT
+
+
+class QuotaScheduler:
+    """Paces every GA4 Data API call so we stay under Google's per-property quotas.
+
+    Each property has two token buckets: the property's own hourly quota, and this
+    Cloud project's hourly share of it. Background work may not dip into the reserve
+    kept for interactive requests. The `property_quota` block GA4 returns with every
+    report keeps both buckets in line with what Google actually counted.
+    """
+
+    def __init__(self):
+        self._quotas: Dict[str, _PropertyQuota] = {}
+        self._lock = threading.Lock()
+
+    def _quota(self, property_id: str) -> _PropertyQuota:
+        quota = self._quotas.get(property_id)
+        if quota is None:
+            quota = self._quotas[property_id] = _PropertyQuota()
+        return quota
+
+    def acquire(self, property_id: str, reports: int = 1, priority: Priority = Priority.INTERACTIVE, max_wait: Optional[float] = None) -> None:
+        """Blocks until quota for `reports` reports is available, or raises QuotaExhaustedError."""
+        if max_wait is None:
+            max_wait = INTERACTIVE_MAX_WAIT_SECONDS if priority == Priority.INTERACTIVE else BACKGROUND_MAX_WAIT_SECONDS
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            with self._lock:
+                quota = self._quota(property_id)
+                now = time.monotonic()
+                cost = quota.tokens_per_report * reports
+                buckets = (quota.property, quota.project)
+                waits = []
+                for bucket in buckets:
+                    bucket.refill(now)
+                    floor = bucket.capacity * BACKGROUND_RESERVE_FRACTION if priority == Priority.BACKGROUND else 0.0
+                    waits.append(bucket.wait_for(cost, floor, now))
+                wait = max(waits)
+                if wait == 0:
+                    for bucket in buckets:
+                        bucket.level -= cost
+                    return
+
+            if now + wait > deadline:
+                raise QuotaExhaustedError(property_id, max(1, math.ceil(wait)) if wait != math.inf else EXHAUSTED_COOL_DOWN_SECONDS)
+            time.sleep(min(wait, deadline - now))
+
+    def observe(self, property_id: str, property_quota, reports: int = 1) -> None:
+        """Adapts to the `property_quota` block returned with a report (requires return_property_quota)."""
+        if property_quota is None:
+            return
+        with self._lock:
+            quota = self._quota(property_id)
+            consumed = property_quota.tokens_per_hour.consumed
+            if consumed and reports:
+                # Smooth the per-report cost so one expensive report doesn't throttle everything
+                quota.tokens_per_report = 0.8 * quota.tokens_per_report + 0.2 * (consumed / reports)
+
+            now = time.monotonic()
+            if "tokens_per_hour" in property_quota:
+                level = property_quota.tokens_per_hour.remaining
+                if "tokens_per_day" in property_quota:
+                    # Late in the day the daily quota can be the tighter limit
+                    level = min(level, property_quota.tokens_per_day.remaining)
+                quota.property.refill(now)
+                quota.property.level = level
+            if "tokens_per_project_per_hour" in property_quota:
+                quota.project.refill(now)
+                quota.project.level = property_quota.tokens_per_project_per_hour.remaining
+
+    def exhausted(self, property_id: str, retry_after: int = EXHAUSTED_COOL_DOWN_SECONDS) -> int:
+        """Records a RESOURCE_EXHAUSTED answer from Google and blocks the property for a while."""
+        with self._lock:
+            quota = self._quota(property_id)
+            blocked_until = time.monotonic() + retry_after
+            for bucket in (quota.property, quota.project):
+                bucket.level = 0.0
+                bucket.blocked_until = blocked_until
+        return retry_after
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for property_id, quota in self._quotas.items():
+                quota.property.refill(now)
+                quota.project.refill(now)
+                result[property_id] = {
+                    "property_tokens": round(quota.property.level, 1),
+                    "project_tokens": round(quota.project.level, 1),
+                    "tokens_per_report": round(quota.tokens_per_report, 1),
+                    "blocked_for": max(0, round(max(quota.property.blocked_until, quota.project.blocked_until) - now, 1)),
+                }
+            return result
+
+
+quota_scheduler = QuotaScheduler()
@@ -0,0 +1,111 @@
+import asyncio
+import contextvars
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Hashable, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.admission import AdmissionController, upstream_admission
+
+# Live dashboard knobs (override in your .env)
+REALTIME_POLL_SECONDS = float(os.getenv("GA4_REALTIME_POLL_SECONDS", "15"))
+REALTIME_MAX_BACKOFF_SECONDS = float(os.getenv("GA4_REALTIME_MAX_BACKOFF_SECONDS", "300"))
+# Comment lines sent on idle streams so proxies don't close them
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "20"))
+
+
+class _Feed:
+    __slots__ = ("viewers", "latest", "task")
+
+    def __init__(self):
+        self.viewers: Set[asyncio.Queue] = set()
+        self.latest: Optional[dict] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class RealtimeHub:
+    """One upstream poller per feed key (integration, property), shared by every viewer in this process.
+
+    The first viewer starts the poller and the last one to leave cancels it. A new viewer
+    gets the latest snapshot straight away. A slow viewer only ever has the newest snapshot
+    queued, never a backlog. Each uvicorn worker runs its own hub.
+
+    Every poll takes a slot from `admission` for the feed's tenant, so live feeds count
+    against the same upstream caps as the rest of the API; a rejected poll backs off like a failed one.
+    """
+
+    def __init__(self, interval: float = REALTIME_POLL_SECONDS, max_backoff: float = REALTIME_MAX_BACKOFF_SECONDS,
+                 admission: Optional[AdmissionController] = None):
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.admission = admission
+        self._feeds: Dict[Hashable, _Feed] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, key: Hashable, loader: Callable[[], dict], tenant: Hashable = None) -> AsyncIterator[asyncio.Queue]:
+        """Joins the feed for `key`, starting its poller if needed. `loader` is blocking and runs on the threadpool."""
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = _Feed()
+            # Started from an empty context, so the poller's upstream time isn't billed to the first viewer's request
+            feed.task = contextvars.Context().run(asyncio.ensure_future, self._poll(key, feed, loader, tenant))
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        if feed.latest is not None:
+            queue.put_nowait(feed.latest)
+        feed.viewers.add(queue)
+        try:
+            yield queue
+        finally:
+            feed.viewers.discard(queue)
+            if not feed.viewers and self._feeds.get(key) is feed:
+                del self._feeds[key]
+                feed.task.cancel()
+
+    async def _poll(self, key: Hashable, feed: _Feed, loader: Callable[[], dict], tenant: Hashable = None) -> None:
+        delay = self.interval
+        while True:
+            try:
+                if self.admission is not None:
+                    async with self.admission.admit(tenant):
+                        snapshot = await run_in_threadpool(loader)
+                else:
+                    snapshot = await run_in_threadpool(loader)
+                delay = self.interval
+            except Exception as e:
+                print(f"Realtime poll failed for {key}: {e}")
+                snapshot = {"status": "error", "message": "Live data is temporarily unavailable."}
+                # Back off while GA4 is failing, and tell viewers when the next try is
+                delay = min(delay * 2, self.max_backoff)
+                snapshot["retry_in"] = delay
+            self._publish(feed, snapshot)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _publish(feed: _Feed, snapshot: dict) -> None:
+        feed.latest = snapshot
+        for queue in feed.viewers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+
+    async def event_stream(self, key: Hashable, loader: Callable[[], dict], event: str = "kpis", tenant: Hashable = None) -> AsyncIterator[str]:
+        """Server-sent events for one viewer: a `event` message per snapshot, heartbeats in between."""
+        async with self.subscribe(key, loader, tenant) as queue:
+            # Tell EventSource how long to wait before reconnecting after a drop
+            yield f"retry: {int(self.interval * 1000)}\n\n"
+            while True:
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+
+    def stats(self) -> dict:
+        return {"feeds": len(self._feeds), "viewers": sum(len(feed.viewers) for feed in self._feeds.values())}
+
+
+realtime_hub = RealtimeHub(admission=upstream_admission)
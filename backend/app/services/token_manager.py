@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from app.core.security import vault
+from app.core.shared_cache import shared_cache
+from app.db.database import SessionLocal
+from app.db.models import Integration
+
+if TYPE_CHECKING:
+    from app.services.managed_credentials import ManagedCredentials
+
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+# Overridable so benchmarks can point OAuth at a local stand-in
+TOKEN_URI = os.getenv("GOOGLE_TOKEN_URI", "https://oauth2.googleapis.com/token")
+
+# Refresh this long before expiry. Must be larger than google-auth's own ~4 minute
+# threshold, otherwise the client library refreshes inline on the request path first.
+TOKEN_REFRESH_AHEAD = timedelta(seconds=int(os.getenv("TOKEN_REFRESH_AHEAD_SECONDS", "600")))
+# Only integrations used within this window are kept warm by the background loop
+TOKEN_ACTIVE_WINDOW_SECONDS = int(os.getenv("TOKEN_ACTIVE_WINDOW_SECONDS", "7200"))
+TOKEN_REFRESH_INTERVAL_SECONDS = 60
+# Compare-and-swap rounds before a refreshed token is given up on (see TokenManager.persist)
+PERSIST_ATTEMPTS = 3
+
+
+def expires_at_from(expires_in) -> int:
+    """Converts Google's relative `expires_in` into an absolute unix timestamp."""
+    return int(time.time()) + int(expires_in or 0)
+
+
+def integration_namespace(integration_id: int) -> str:
+    """Shared-cache namespace for everything cached on an integration's behalf; invalidated when it is re-linked."""
+    return f"integration:{integration_id}"
+
+
+def _expiry_datetime(expires_at):
+    # google-auth compares against naive UTC datetimes
+    if not expires_at:
+        return None
+    return datetime.fromtimestamp(int(expires_at), timezone.utc).replace(tzinfo=None)
+
+
+def expiring_soon(credentials) -> bool:
+    """True when the access token is missing an expiry or is inside the refresh-ahead window."""
+    if credentials.expiry is None:
+        return True
+    return credentials.expiry - datetime.utcnow() < TOKEN_REFRESH_AHEAD
+
+
+class TokenManager:
+    """Keeps one live credentials object per integration and refreshes it before it expires."""
+
+    def __init__(self):
+        self._credentials = {}
+        self._last_used = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="token-refresh")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def lock_for(self, integration_id: int) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(integration_id, threading.Lock())
+
+    def credentials_for(self, integration: Integration) -> "ManagedCredentials":
+        """Returns the shared credentials for an integration, building them from the DB row if needed."""
+        # google-auth is imported on first use, not at startup
+        from app.services.managed_credentials import ManagedCredentials
+
+        with self._lock:
+            credentials = self._credentials.get(integration.id)
+            if credentials is None:
+                creds_data = vault.open(integration.encrypted_credentials)
+                credentials = ManagedCredentials(
+                    integration.id,
+                    self,
+                    token=creds_data.get("access_token"),
+                    refresh_token=creds_data.get("refresh_token"),
+                    # Rows saved before expiry tracking are treated as expired so they refresh once
+                    expiry=_expiry_datetime(creds_data.get("expires_at")) or datetime(1970, 1, 1),
+                    token_uri=TOKEN_URI,
+                    client_id=GOOGLE_CLIENT_ID,
+                    client_secret=GOOGLE_CLIENT_SECRET,
+                )
+                self._credentials[integration.id] = credentials
+            self._last_used[integration.id] = time.monotonic()
+
+        if expiring_soon(credentials):
+            self.refresh_in_background(integration.id)
+        return credentials
+
+    def refresh_in_background(self, integration_id: int) -> None:
+        with self._lock:
+            if integration_id in self._pending or integration_id not in self._credentials:
+                return
+            self._pending.add(integration_id)
+        self._refresher.submit(self._refresh, integration_id)
+
+    def _refresh(self, integration_id: int) -> None:
+        try:
+            credentials = self._credentials.get(integration_id)
+            if credentials is not None:
+                import google.auth.transport.requests
+                credentials.refresh(google.auth.transport.requests.Request())
+        except Exception as e:
+            print(f"Token refresh failed for integration {integration_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(integration_id)
+
+    def persist(self, integration_id: int, credentials: "ManagedCredentials") -> None:
+        """Writes a refreshed access token and its absolute expiry back to the integration row.
+
+        The write is a compare-and-swap on the sealed column, so it never lands on top of a
+        concurrent write. If the row's refresh token is no longer the one these credentials
+        were loaded with, the integration was re-linked meanwhile and the old login's token is dropped.
+        """
+        db = SessionLocal()
+        try:
+            for _ in range(PERSIST_ATTEMPTS):
+                integration = db.query(Integration).filter(Integration.id == integration_id).first()
+                if integration is None:
+                    return
+                sealed = integration.encrypted_credentials
+                creds_data = vault.open(sealed)
+                if creds_data.get("refresh_token") != credentials.stored_refresh_token:
+                    print(f"Integration {integration_id} was re-linked during a token refresh; dropping the old login's token")
+                    self.forget(integration_id)
+                    return
+                creds_data["access_token"] = credentials.token
+                creds_data["expires_at"] = int(credentials.expiry.replace(tzinfo=timezone.utc).timestamp())
+                # Only a rotated refresh token is written back
+                if credentials.refresh_token and credentials.refresh_token != credentials.stored_refresh_token:
+                    creds_data["refresh_token"] = credentials.refresh_token
+                swapped = db.query(Integration).filter(
+                    Integration.id == integration_id,
+                    Integration.encrypted_credentials == sealed,
+                ).update({Integration.encrypted_credentials: vault.seal(creds_data)}, synchronize_session=False)
+                db.commit()
+                if swapped:
+                    credentials.stored_refresh_token = creds_data.get("refresh_token")
+                    break
+                # Someone else wrote the row since we read it; look again
+                db.expire_all()
+            else:
+                print(f"Could not persist the refreshed token for integration {integration_id}: the row kept changing")
+                return
+        finally:
+            db.close()
+        self.share(integration_id, credentials)
+
+    def share(self, integration_id: int, credentials: "ManagedCredentials") -> None:
+        """Publishes a refreshed access token to the other workers, sealed like the stored credentials."""
+        expires_at = int(credentials.expiry.replace(tzinfo=timezone.utc).timestamp())
+        sealed = vault.seal({"access_token": credentials.token, "expires_at": expires_at})
+        shared_cache.set("oauth_tokens", integration_id, sealed, expires_at - time.time(), namespace=integration_namespace(integration_id))
+
+    def adopt_shared_token(self, integration_id: int, credentials: "ManagedCredentials") -> bool:
+        """Takes over a token another worker refreshed, if it is good for a while yet. Returns whether it did."""
+        hit = shared_cache.get("oauth_tokens", integration_id, namespace=integration_namespace(integration_id))
+        if hit is None:
+            return False
+        token = vault.open(hit[0])
+        expiry = _expiry_datetime(token.get("expires_at"))
+        if expiry is None or expiry - datetime.utcnow() < TOKEN_REFRESH_AHEAD:
+            return False
+        credentials.token = token["access_token"]
+        credentials.expiry = expiry
+        return True
+
+    def forget(self, integration_id: int) -> None:
+        """Drops the cached credentials, e.g. after the integration was re-linked."""
+        with self._lock:
+            self._credentials.pop(integration_id, None)
+            self._last_used.pop(integration_id, None)
+
+    def start(self) -> None:
+        """Starts the loop that refreshes recently used integrations ahead of expiry."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-refresh-ahead", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(TOKEN_REFRESH_INTERVAL_SECONDS):
+            cutoff = time.monotonic() - TOKEN_ACTIVE_WINDOW_SECONDS
+            with self._lock:
+                # Idle integrations are not kept warm; they refresh on their next use
+                active = [
+                    (integration_id, self._credentials[integration_id])
+                    for integration_id, last_used in self._last_used.items()
+                    if last_used >= cutoff and integration_id in self._credentials
+                ]
+            for integration_id, credentials in active:
+                if expiring_soon(credentials):
+                    self.refresh_in_background(integration_id)
+
+
+token_manager = TokenManager()
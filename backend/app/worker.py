@@ -0,0 +1,107 @@
+"""Background jobs that run outside the web process.
+
+Usage (from the backend/ folder):
+    python -m app.worker sync-ga4 [--concurrency 4] [--loop --interval 3600]
+    python -m app.worker detect-anomalies
+    python -m app.worker update-forecasts
+    python -m app.worker sync-ads [--concurrency 8] [--loop --interval 21600]
+    python -m app.worker rotate-keys [--batch-size 200]
+
+Run `alembic upgrade head` first; the worker doesn't create tables.
+"""
+import argparse
+import time
+
+from app.db.database import SessionLocal
+from app.services import ads_ingestion
+from app.services.anomaly_engine import detect_anomalies
+from app.services.credential_rotation import ROTATION_BATCH_SIZE, rotate_credentials
+from app.services.forecasting import FORECAST_METRICS, update_forecasts
+from app.services.ga4_ingestion import INGEST_CONCURRENCY, run_sync
+
+
+def _sync_ga4(args) -> None:
+    summary = run_sync(concurrency=args.concurrency)
+    print(f"GA4 sync finished: {summary['properties']} properties, {summary['rows']} rows, {len(summary['failed'])} failed")
+    # Fresh days just landed, so re-score them and roll the forecasts forward straight away
+    _detect_anomalies(args)
+    _update_forecasts(args)
+
+
+def _detect_anomalies(args) -> None:
+    db = SessionLocal()
+    try:
+        found = detect_anomalies(db)
+    finally:
+        db.close()
+    print(f"Anomaly detection finished: {found} anomalies")
+
+
+def _update_forecasts(args) -> None:
+    db = SessionLocal()
+    try:
+        for metric in FORECAST_METRICS:
+            summary = update_forecasts(db, metric)
+            print(f"Forecasts for {metric}: {summary['refit']} refit, {summary['updated']} rolled forward, {summary['properties']} properties")
+    finally:
+        db.close()
+
+
+def _sync_ads(args) -> None:
+    summary = ads_ingestion.run_sync(concurrency=args.concurrency)
+    print(f"Ad spend sync finished: {summary['integrations']} integrations, {summary['accounts']} accounts, {summary['rows']} rows, {len(summary['failed'])} failed")
+
+
+def _rotate_keys(args) -> None:
+    summary = rotate_credentials(batch_size=args.batch_size)
+    print(f"Key rotation finished: {summary['rotated']} of {summary['scanned']} integrations re-encrypted, "
+          f"{summary['skipped']} changed underneath us, {summary['failed']} unreadable")
+
+
+def _run(job, args) -> None:
+    while True:
+        started = time.monotonic()
+        try:
+            job(args)
+        except Exception as e:
+            if not args.loop:
+                raise
+            print(f"Job failed: {e}")
+        if not args.loop:
+            return
+        time.sleep(max(0, args.interval - (time.monotonic() - started)))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="ArbFlow background jobs")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    sync_ga4 = subcommands.add_parser("sync-ga4", help="Pull daily GA4 metrics for every connected property")
+    sync_ga4.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY, help="Properties synced at the same time")
+    sync_ga4.set_defaults(job=_sync_ga4)
+
+    anomalies = subcommands.add_parser("detect-anomalies", help="Score every property's recent days for traffic anomalies")
+    anomalies.set_defaults(job=_detect_anomalies)
+
+    forecasts = subcommands.add_parser("update-forecasts", help="Refit or roll forward every property's stored traffic forecast models")
+    forecasts.set_defaults(job=_update_forecasts)
+
+    sync_ads = subcommands.add_parser("sync-ads", help="Pull daily campaign spend from every linked Google Ads and Meta Ads account")
+    sync_ads.add_argument("--concurrency", type=int, default=ads_ingestion.ADS_SYNC_CONCURRENCY, help="Ad accounts pulled at the same time")
+    sync_ads.set_defaults(job=_sync_ads)
+
+    rotate_keys = subcommands.add_parser("rotate-keys", help="Re-encrypt stored credentials with the newest key in ENCRYPTION_KEYS")
+    rotate_keys.add_argument("--batch-size", type=int, default=ROTATION_BATCH_SIZE, help="Rows re-encrypted per transaction")
+    rotate_keys.set_defaults(job=_rotate_keys)
+
+    for subcommand in subcommands.choices.values():
+        subcommand.add_argument("--loop", action="store_true", help="Keep running on an interval")
+        subcommand.add_argument("--interval", type=int, default=3600, help="Seconds between runs with --loop")
+
+    args = parser.parse_args(argv)
+
+    _run(args.job, args)
+
+
+if __name__ == "__main__":
+    main()
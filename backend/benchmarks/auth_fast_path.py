@@ -0,0 +1,82 @@
+"""Benchmark: authenticated-request throughput during a login burst.
+
+Compares the principal cache switched off (every request runs a SELECT on `users`)
+with it switched on, while a burst of bcrypt logins runs on the side.
+
+Usage (from the backend/ folder):
+    python -m benchmarks.auth_fast_path [--requests 2000] [--concurrency 50] [--logins 40]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Use a throwaway SQLite database unless the caller points us somewhere else
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+# The app no longer creates tables on startup, so a throwaway database needs the migrations first
+if os.environ["DATABASE_URL"].startswith("sqlite"):
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True, capture_output=True)
+
+import httpx
+
+from app.main import app
+from app.api import deps
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+async def _login(client: httpx.AsyncClient) -> str:
+    response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _authenticated_burst(client: httpx.AsyncClient, token: str, requests: int, concurrency: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get("/api/v1/analytics/cache/stats", headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def _scenario(client: httpx.AsyncClient, token: str, args, cache_enabled: bool) -> float:
+    deps.principal_cache.clear()
+    # A TTL of zero makes every lookup a miss, i.e. the old one-SELECT-per-request behaviour
+    deps.principal_cache.ttl = deps.PRINCIPAL_CACHE_TTL_SECONDS if cache_enabled else 0
+
+    logins = asyncio.gather(*(_login(client) for _ in range(args.logins)))
+    throughput = await _authenticated_burst(client, token, args.requests, args.concurrency)
+    await logins
+    return throughput
+
+
+async def main(args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/v1/auth/register", json={"company_name": "Bench Co", "email": EMAIL, "password": PASSWORD})
+        token = await _login(client)
+
+        uncached = await _scenario(client, token, args, cache_enabled=False)
+        cached = await _scenario(client, token, args, cache_enabled=True)
+
+    print(f"authenticated req/s, principal cache off: {uncached:8.1f}")
+    print(f"authenticated req/s, principal cache on:  {cached:8.1f}")
+    print(f"speed-up: {cached / uncached:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=40)
+    asyncio.run(main(parser.parse_args()))
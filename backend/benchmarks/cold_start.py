@@ -0,0 +1,116 @@
+"""Benchmark: cold start of the web process.
+
+Reports where import time goes (per app module and per third-party package, from
+`python -X importtime`), and how long a fresh uvicorn process takes to answer its
+first request.
+
+Usage (from the backend/ folder):
+    python -m benchmarks.cold_start [--top 15] [--runs 3] [--output cold_start.json] [--budget-ms 1500]
+
+With --budget-ms the script exits non-zero when importing app.main takes longer, so
+it can guard against import-time regressions in CI.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+ENV = dict(os.environ)
+# Use a throwaway SQLite database unless the caller points us somewhere else
+ENV.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/cold_start.db")
+
+
+def import_timings() -> list:
+    """(module, self_us, cumulative_us) for every module imported by `import app.main`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=ENV, capture_output=True, text=True, check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def group_timings(timings: list) -> dict:
+    """Self time summed per app module (app.*) and per third-party top-level package."""
+    groups = defaultdict(int)
+    for name, self_us, _ in timings:
+        key = name if name.startswith("app.") or name == "app" else name.split(".")[0]
+        groups[key] += self_us
+    return dict(groups)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_byte(timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn to the first successful response on `/`."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    response.read()
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("uvicorn did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args) -> int:
+    timings = import_timings()
+    total_ms = next(cumulative for name, _, cumulative in timings if name == "app.main") / 1000
+    groups = sorted(group_timings(timings).items(), key=lambda item: item[1], reverse=True)
+    ttfb_ms = sorted(time_to_first_byte() * 1000 for _ in range(args.runs))
+
+    print(f"import app.main: {total_ms:.0f} ms")
+    print(f"time to first byte (median of {args.runs}): {ttfb_ms[len(ttfb_ms) // 2]:.0f} ms")
+    print(f"\nSlowest imports (self time, grouped):")
+    for name, self_us in groups[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+    google_modules = [name for name, _, _ in timings if name.startswith("google.")]
+    if google_modules:
+        print(f"\nWarning: {len(google_modules)} google.* modules are imported at startup")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "import_ms": round(total_ms, 1),
+                "ttfb_ms": [round(value, 1) for value in ttfb_ms],
+                "modules": {name: round(self_us / 1000, 2) for name, self_us in groups},
+            }, f, indent=2)
+
+    if args.budget_ms and total_ms > args.budget_ms:
+        print(f"\nFAIL: import time {total_ms:.0f} ms is over the {args.budget_ms} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--budget-ms", type=float, help="Fail when importing app.main takes longer than this")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,243 @@
+"""A local stand-in for the Google Ads API (REST searchStream) and the Meta Marketing API (async insights).
+
+Each ad account gets a handful of campaigns with deterministic daily spend. The Google Ads
+login also reaches a manager (MCC) account, which rejects metric queries like the real
+one and lists the client accounts under it. Latency and throttling can be injected, and Meta insights jobs report "Job Running" for a few polls
+before completing, like the real API.
+
+Point the backend at it with:
+    GOOGLE_ADS_API_ENDPOINT=http://127.0.0.1:8901/googleads/v17
+    META_GRAPH_API_ENDPOINT=http://127.0.0.1:8901/graph/v19.0
+    META_REPORT_POLL_SECONDS=0.1
+
+Usage (from the backend/ folder):
+    python -m benchmarks.fake_ads [--port 8901] [--accounts 5] [--managers 1] [--campaigns 4] [--latency-ms 80] [--error-rate 0.01]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from benchmarks.fake_google import BackgroundServer, _Counters
+
+GOOGLE_ADS_PREFIX = "/googleads/v17"
+META_PREFIX = "/graph/v19.0"
+
+
+@dataclass
+class FakeAdsConfig:
+    latency_ms: float = 0.0 # Mean added latency per call
+    jitter_ms: float = 0.0 # Uniform +/- spread around the mean
+    error_rate: float = 0.0 # Share of calls answered with a throttling error
+    accounts: int = 5 # Ad accounts per login, on each platform
+    managers: int = 1 # Google Ads manager accounts per login, on top of `accounts`
+    campaigns: int = 4 # Campaigns per ad account
+    job_polls: int = 2 # Polls a Meta insights job stays "Job Running"
+    stream_batch_rows: int = 50 # Rows per searchStream batch
+    seed: int = 7
+
+
+def _number(low: int, high: int, *parts) -> int:
+    """Deterministic pseudo-random integer, so repeated pulls agree."""
+    digest = int(hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest()[:8], 16)
+    return low + digest % (high - low + 1)
+
+
+def _campaign_days(account_id: str, since: date, until: date, campaigns: int):
+    """(day, campaign_id, campaign_name, impressions, clicks, spend_cents, conversions) rows."""
+    for offset in range((until - since).days + 1):
+        day = since + timedelta(days=offset)
+        for n in range(campaigns):
+            campaign_id = f"{account_id}{n:03d}"
+            impressions = _number(500, 20000, account_id, campaign_id, day, "impressions")
+            clicks = impressions * _number(5, 40, account_id, campaign_id, day, "ctr") // 1000
+            spend_cents = clicks * _number(20, 300, account_id, campaign_id, day, "cpc")
+            conversions = clicks * _number(0, 80, account_id, campaign_id, day, "cvr") // 1000
+            yield day, campaign_id, f"Campaign {n + 1}", impressions, clicks, spend_cents, conversions
+
+
+def create_app(config: FakeAdsConfig) -> Starlette:
+    rng = random.Random(config.seed)
+    counters = _Counters()
+    jobs = {}
+
+    async def _inject(endpoint: str) -> bool:
+        """Sleeps the configured latency; returns True when a throttling error should be sent."""
+        counters.add(endpoint)
+        delay = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return rng.random() < config.error_rate
+
+    def _google_ads_throttled() -> JSONResponse:
+        return JSONResponse({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Injected throttling"}}, status_code=429)
+
+    def _meta_throttled() -> JSONResponse:
+        return JSONResponse({"error": {"code": 17, "message": "User request limit reached", "is_transient": True}}, status_code=400)
+
+    def _account_ids(base: int):
+        return [str(base + i) for i in range(config.accounts)]
+
+    # --- Google Ads ---
+
+    def _manager_ids():
+        return [str(900000000 + i) for i in range(config.managers)]
+
+    def _customer_client(customer_id: str, manager: bool, level: int) -> dict:
+        # Proto3 JSON leaves out false booleans, like the real API
+        client = {"resourceName": f"customers/{customer_id}/customerClients/{customer_id}", "id": customer_id, "level": str(level), "status": "ENABLED"}
+        if manager:
+            client["manager"] = True
+        return {"customerClient": client}
+
+    async def list_customers(request: Request):
+        if await _inject("listAccessibleCustomers"):
+            return _google_ads_throttled()
+        return JSONResponse({"resourceNames": [f"customers/{cid}" for cid in _account_ids(1000000000) + _manager_ids()]})
+
+    async def search_stream(request: Request):
+        if await _inject("searchStream"):
+            return _google_ads_throttled()
+        customer_id = request.path_params["customer_id"]
+        query = (await request.json())["query"]
+        resource = re.search(r"FROM\s+(\w+)", query).group(1)
+        is_manager = customer_id in _manager_ids()
+        if resource == "customer":
+            rows = [{"customer": {"resourceName": f"customers/{customer_id}", "id": customer_id, "manager": is_manager}}]
+        elif resource == "customer_client":
+            rows = [_customer_client(customer_id, is_manager, 0)]
+            if is_manager:
+                rows += [_customer_client(client_id, False, 1) for client_id in _account_ids(1000000000)]
+            if "manager = FALSE" in query:
+                rows = [row for row in rows if not row["customerClient"].get("manager")]
+        elif is_manager:
+            return JSONResponse({"error": {"code": 400, "status": "INVALID_ARGUMENT", "message": "Metrics cannot be requested for a manager account."}}, status_code=400)
+        else:
+            since, until = (date.fromisoformat(day) for day in re.search(r"BETWEEN '([\d-]+)' AND '([\d-]+)'", query).groups())
+            rows = [{
+                "customer": {"resourceName": f"customers/{customer_id}", "id": customer_id, "currencyCode": "USD"},
+                "campaign": {"resourceName": f"customers/{customer_id}/campaigns/{campaign_id}", "id": campaign_id, "name": name},
+                "metrics": {"impressions": str(impressions), "clicks": str(clicks), "costMicros": str(spend_cents * 10000), "conversions": float(conversions)},
+                "segments": {"date": day.isoformat()},
+            } for day, campaign_id, name, impressions, clicks, spend_cents, conversions in _campaign_days(customer_id, since, until, config.campaigns)]
+
+        async def body():
+            # A JSON array of result batches, sent in small chunks so batches straddle chunk boundaries
+            batches = [rows[i:i + config.stream_batch_rows] for i in range(0, len(rows), config.stream_batch_rows)] or [[]]
+            text = "[" + ",\n".join(json.dumps({"results": batch, "fieldMask": "customer.id,campaign.id", "requestId": uuid.uuid4().hex}) for batch in batches) + "]"
+            for i in range(0, len(text), 4096):
+                yield text[i:i + 4096]
+                await asyncio.sleep(0)
+
+        return StreamingResponse(body(), media_type="application/json")
+
+    # --- Meta ---
+
+    def _page(request: Request, items: list, limit: int) -> dict:
+        after = int(request.query_params.get("after", 0))
+        page = {"data": items[after:after + limit], "paging": {"cursors": {"after": str(after + limit)}}}
+        if after + limit < len(items):
+            page["paging"]["next"] = str(request.url.include_query_params(after=after + limit, limit=limit))
+        return page
+
+    async def ad_accounts(request: Request):
+        if await _inject("adaccounts"):
+            return _meta_throttled()
+        accounts = [{"account_id": account_id, "id": f"act_{account_id}"} for account_id in _account_ids(2000000000)]
+        return JSONResponse(_page(request, accounts, int(request.query_params.get("limit", 25))))
+
+    async def start_insights(request: Request):
+        if await _inject("startInsights"):
+            return _meta_throttled()
+        form = await request.form()
+        time_range = json.loads(form["time_range"])
+        report_run_id = uuid.uuid4().hex[:16]
+        jobs[report_run_id] = {
+            "account_id": request.path_params["account_id"],
+            "since": date.fromisoformat(time_range["since"]),
+            "until": date.fromisoformat(time_range["until"]),
+            "polls_left": config.job_polls,
+        }
+        return JSONResponse({"report_run_id": report_run_id})
+
+    async def insights_job(request: Request):
+        if await _inject("pollInsights"):
+            return _meta_throttled()
+        job = jobs.get(request.path_params["report_run_id"])
+        if job is None:
+            return JSONResponse({"error": {"code": 100, "message": "Unknown report run"}}, status_code=400)
+        job["polls_left"] -= 1
+        done = job["polls_left"] < 0
+        return JSONResponse({
+            "id": request.path_params["report_run_id"],
+            "async_status": "Job Completed" if done else "Job Running",
+            "async_percent_completion": 100 if done else 50,
+        })
+
+    async def insights_results(request: Request):
+        if await _inject("readInsights"):
+            return _meta_throttled()
+        job = jobs.get(request.path_params["report_run_id"])
+        if job is None:
+            return JSONResponse({"error": {"code": 100, "message": "Unknown report run"}}, status_code=400)
+        rows = [{
+            "campaign_id": campaign_id,
+            "campaign_name": name,
+            "impressions": str(impressions),
+            "clicks": str(clicks),
+            "spend": f"{spend_cents / 100:.2f}",
+            "actions": [{"action_type": "purchase", "value": str(conversions)}, {"action_type": "link_click", "value": str(clicks)}],
+            "account_currency": "EUR",
+            "date_start": day.isoformat(),
+            "date_stop": day.isoformat(),
+        } for day, campaign_id, name, impressions, clicks, spend_cents, conversions in _campaign_days(job["account_id"], job["since"], job["until"], config.campaigns)]
+        return JSONResponse(_page(request, rows, int(request.query_params.get("limit", 25))))
+
+    async def stats(request: Request):
+        return JSONResponse({"calls": counters.calls, "config": vars(config)})
+
+    app = Starlette(routes=[
+        Route(f"{GOOGLE_ADS_PREFIX}/customers:listAccessibleCustomers", list_customers, methods=["GET"]),
+        Route(f"{GOOGLE_ADS_PREFIX}/customers/{{customer_id}}/googleAds:searchStream", search_stream, methods=["POST"]),
+        Route(f"{META_PREFIX}/me/adaccounts", ad_accounts, methods=["GET"]),
+        Route(f"{META_PREFIX}/act_{{account_id}}/insights", start_insights, methods=["POST"]),
+        Route(f"{META_PREFIX}/{{report_run_id}}/insights", insights_results, methods=["GET"]),
+        Route(f"{META_PREFIX}/{{report_run_id}}", insights_job, methods=["GET"]),
+        Route("/_stats", stats, methods=["GET"]),
+    ])
+    app.state.counters = counters
+    return app
+
+
+class FakeAdsServer(BackgroundServer):
+    """The ads stand-in on a background thread: `with FakeAdsServer(config) as url: ...`."""
+
+    def __init__(self, config: FakeAdsConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        super().__init__(create_app(config), host, port, name="fake-ads")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--managers", type=int, default=1)
+    parser.add_argument("--campaigns", type=int, default=4)
+    args = parser.parse_args()
+    config = FakeAdsConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.accounts, args.managers, args.campaigns)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,260 @@
+"""A local stand-in for the GA4 Data API, the GA4 Admin API and Google's OAuth token endpoint.
+
+It speaks the REST/JSON flavour of the APIs, with synthetic but deterministic data. Latency
+and failures can be injected so the backend can be load-tested without touching Google.
+
+Point the backend at it with:
+    GA4_DATA_API_ENDPOINT=http://127.0.0.1:8900
+    GA4_ADMIN_API_ENDPOINT=http://127.0.0.1:8900
+    GOOGLE_TOKEN_URI=http://127.0.0.1:8900/token
+
+Usage (from the backend/ folder):
+    python -m benchmarks.fake_google [--port 8900] [--latency-ms 120] [--jitter-ms 40] [--error-rate 0.01]
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.cache import resolve_date_range
+
+# Sources/mediums the synthetic reports break traffic down by
+CHANNELS = [
+    ("google", "organic"), ("google", "cpc"), ("facebook", "paid_social"), ("instagram", "social"),
+    ("newsletter", "email"), ("(direct)", "(none)"), ("bing", "organic"), ("linkedin", "referral"),
+]
+FLOAT_METRICS = {"bounceRate": "TYPE_FLOAT", "averageSessionDuration": "TYPE_SECONDS", "engagementRate": "TYPE_FLOAT", "totalRevenue": "TYPE_CURRENCY", "keyEvents": "TYPE_FLOAT"}
+
+
+@dataclass
+class FakeGoogleConfig:
+    latency_ms: float = 0.0 # Mean added latency per call
+    jitter_ms: float = 0.0 # Uniform +/- spread around the mean
+    error_rate: float = 0.0 # Share of calls answered 503 UNAVAILABLE
+    quota_error_rate: float = 0.0 # Share of GA4 calls answered 429 RESOURCE_EXHAUSTED
+    properties: int = 3 # Properties per account summary
+    seed: int = 7
+
+
+class _Counters:
+    def __init__(self):
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str) -> None:
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+
+def _metric_value(metric: str, *parts) -> str:
+    """Deterministic pseudo-random value, so repeated reports agree (and ETags stay stable)."""
+    digest = int(hashlib.md5("|".join((metric,) + tuple(str(p) for p in parts)).encode()).hexdigest()[:8], 16)
+    if metric == "bounceRate" or metric == "engagementRate":
+        return f"{0.2 + (digest % 600) / 1000:.4f}"
+    if metric == "averageSessionDuration":
+        return f"{20 + (digest % 2400) / 10:.1f}"
+    if metric == "totalRevenue":
+        return f"{(digest % 200000) / 100:.2f}"
+    if metric == "keyEvents":
+        return str(float(digest % 60))
+    return str(50 + digest % 5000)
+
+
+def _report(property_id: str, request: dict) -> dict:
+    dimensions = [d["name"] for d in request.get("dimensions", [])]
+    metrics = [m["name"] for m in request.get("metrics", [])]
+    date_range = (request.get("dateRanges") or [{}])[0]
+    start, end = (date.fromisoformat(day) for day in resolve_date_range(date_range.get("startDate", "30daysAgo"), date_range.get("endDate", "today")))
+
+    # Every combination of the requested dimensions (date x channel x campaign)
+    combos = [{}]
+    if "date" in dimensions:
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        combos = [dict(c, date=day.strftime("%Y%m%d")) for c in combos for day in days]
+    if {"sessionSource", "sessionMedium", "sessionSourceMedium"} & set(dimensions):
+        combos = [dict(c, sessionSource=s, sessionMedium=m, sessionSourceMedium=f"{s} / {m}") for c in combos for s, m in CHANNELS]
+    if "sessionCampaignName" in dimensions:
+        combos = [dict(c, sessionCampaignName=name) for c in combos for name in ("(not set)", "spring_sale", "brand")]
+
+    offset = int(request.get("offset", 0))
+    limit = int(request.get("limit", 0)) or 10000
+    page = combos[offset:offset + limit]
+    rows = [{
+        "dimensionValues": [{"value": combo.get(name, "(not set)")} for name in dimensions],
+        "metricValues": [{"value": _metric_value(metric, property_id, start, end, *combo.values())} for metric in metrics],
+    } for combo in page]
+
+    report = {
+        "dimensionHeaders": [{"name": name} for name in dimensions],
+        "metricHeaders": [{"name": name, "type": FLOAT_METRICS.get(name, "TYPE_INTEGER")} for name in metrics],
+        "rows": rows,
+        "rowCount": len(combos),
+        "kind": "analyticsData#runReport",
+    }
+    if request.get("returnPropertyQuota"):
+        # Generous quota so the backend's scheduler never becomes the bottleneck under test
+        report["propertyQuota"] = {
+            "tokensPerDay": {"consumed": 10, "remaining": 10_000_000},
+            "tokensPerHour": {"consumed": 10, "remaining": 1_000_000},
+            "tokensPerProjectPerHour": {"consumed": 10, "remaining": 1_000_000},
+            "concurrentRequests": {"consumed": 0, "remaining": 10},
+        }
+    return report
+
+
+def _realtime_report(property_id: str, request: dict) -> dict:
+    """A realtime report whose numbers change every minute, like the real thing."""
+    dimensions = [d["name"] for d in request.get("dimensions", [])]
+    metrics = [m["name"] for m in request.get("metrics", [])]
+    minute = int(time.time() // 60)
+    values = ["desktop", "mobile", "tablet"] if dimensions else [None]
+    rows = [{
+        "dimensionValues": [{"value": value} for _ in dimensions],
+        "metricValues": [{"value": str(int(_metric_value(metric, property_id, minute, value)) // 50)} for metric in metrics],
+    } for value in values]
+    return {
+        "dimensionHeaders": [{"name": name} for name in dimensions],
+        "metricHeaders": [{"name": name, "type": "TYPE_INTEGER"} for name in metrics],
+        "rows": rows,
+        "rowCount": len(rows),
+        "kind": "analyticsData#runRealtimeReport",
+    }
+
+
+def _google_error(code: int, status: str, message: str) -> JSONResponse:
+    return JSONResponse({"error": {"code": code, "status": status, "message": message}}, status_code=code)
+
+
+def create_app(config: FakeGoogleConfig) -> Starlette:
+    rng = random.Random(config.seed)
+    counters = _Counters()
+
+    async def _inject(endpoint: str, ga4: bool = True):
+        """Sleeps the configured latency; returns an error response when a failure is injected."""
+        counters.add(endpoint)
+        delay = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        roll = rng.random()
+        if roll < config.error_rate:
+            return _google_error(503, "UNAVAILABLE", "Injected failure")
+        if ga4 and roll < config.error_rate + config.quota_error_rate:
+            return _google_error(429, "RESOURCE_EXHAUSTED", "Injected quota exhaustion")
+        return None
+
+    async def token(request: Request):
+        error = await _inject("token", ga4=False)
+        if error is not None:
+            return JSONResponse({"error": "temporarily_unavailable", "error_description": "Injected failure"}, status_code=503)
+        form = await request.form()
+        body = {
+            "access_token": f"fake-{uuid.uuid4().hex}",
+            "expires_in": 3599,
+            "token_type": "Bearer",
+            "scope": "https://www.googleapis.com/auth/analytics.readonly",
+        }
+        if form.get("grant_type") == "authorization_code":
+            body["refresh_token"] = f"fake-refresh-{uuid.uuid4().hex}"
+        elif form.get("grant_type") != "refresh_token":
+            return JSONResponse({"error": "unsupported_grant_type"}, status_code=400)
+        return JSONResponse(body)
+
+    async def data_api(request: Request):
+        # Paths look like /v1beta/properties/123:runReport
+        resource, _, method = request.path_params["resource"].partition(":")
+        property_id = f"properties/{resource}"
+        error = await _inject(method)
+        if error is not None:
+            return error
+        payload = await request.json()
+        if method == "runReport":
+            return JSONResponse(_report(property_id, payload))
+        if method == "runRealtimeReport":
+            return JSONResponse(_realtime_report(property_id, payload))
+        if method == "batchRunReports":
+            return JSONResponse({"reports": [_report(property_id, r) for r in payload.get("requests", [])], "kind": "analyticsData#batchRunReports"})
+        return _google_error(404, "NOT_FOUND", f"Unknown method {method}")
+
+    async def account_summaries(request: Request):
+        error = await _inject("accountSummaries")
+        if error is not None:
+            return error
+        return JSONResponse({"accountSummaries": [{
+            "name": "accountSummaries/1",
+            "account": "accounts/1",
+            "displayName": "Bench Agency",
+            "propertySummaries": [
+                {"property": f"properties/{1000 + i}", "displayName": f"Client site {i + 1}", "propertyType": "PROPERTY_TYPE_ORDINARY"}
+                for i in range(config.properties)
+            ],
+        }]})
+
+    async def stats(request: Request):
+        return JSONResponse({"calls": counters.calls, "config": vars(config)})
+
+    app = Starlette(routes=[
+        Route("/token", token, methods=["POST"]),
+        Route("/v1beta/properties/{resource}", data_api, methods=["POST"]),
+        Route("/v1alpha/accountSummaries", account_summaries, methods=["GET"]),
+        Route("/v1beta/accountSummaries", account_summaries, methods=["GET"]),
+        Route("/_stats", stats, methods=["GET"]),
+    ])
+    app.state.counters = counters
+    return app
+
+
+class BackgroundServer:
+    """Runs a Starlette app under uvicorn on a background thread: `with BackgroundServer(app) as url: ...`."""
+
+    def __init__(self, app: Starlette, host: str = "127.0.0.1", port: int = 0, name: str = "fake-server"):
+        self.app = app
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning", access_log=False))
+        self._thread = threading.Thread(target=self._server.run, name=name, daemon=True)
+
+    @property
+    def calls(self) -> dict:
+        return dict(self.app.state.counters.calls)
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class FakeGoogleServer(BackgroundServer):
+    """The GA4/OAuth stand-in on a background thread: `with FakeGoogleServer(config) as url: ...`."""
+
+    def __init__(self, config: FakeGoogleConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        super().__init__(create_app(config), host, port, name="fake-google")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-error-rate", type=float, default=0.0)
+    parser.add_argument("--properties", type=int, default=3)
+    args = parser.parse_args()
+    config = FakeGoogleConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.quota_error_rate, args.properties)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,259 @@
+"""Load test: drives login, dashboard and Google callback at set concurrency levels.
+
+Starts the fake Google APIs (benchmarks/fake_google.py) in-process, migrates a throwaway
+SQLite database, and boots the backend under uvicorn pointed at both. It then creates
+test users, links each to the fake Google account, and runs closed-loop clients
+against each scenario. The report covers p50/p95/p99 latency, throughput and errors
+per scenario and concurrency level.
+
+Usage (from the backend/ folder):
+    python -m benchmarks.load_test [--concurrency 1,10,50] [--duration 10] [--scenarios login,dashboard,callback]
+                                   [--latency-ms 120 --jitter-ms 40 --error-rate 0.0]
+                                   [--output load_test.json] [--baseline previous.json]
+
+Pass --database-url to test against Postgres instead (it must already be migrated).
+Pass --dashboard-refresh to bypass the report cache on every dashboard call.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_google import FakeGoogleConfig, FakeGoogleServer
+
+SCENARIOS = ("login", "dashboard", "callback")
+PASSWORD = "bench-password"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+class Backend:
+    """The API under uvicorn in a child process, wired to the fake Google server."""
+
+    def __init__(self, google_url: str, database_url: str, workers: int):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            GA4_DATA_API_ENDPOINT=google_url,
+            GA4_ADMIN_API_ENDPOINT=google_url,
+            GOOGLE_TOKEN_URI=f"{google_url}/token",
+            GOOGLE_CLIENT_ID="bench-client",
+            GOOGLE_CLIENT_SECRET="bench-secret",
+        )
+        self.workers = workers
+        self.process = None
+
+    def __enter__(self) -> "Backend":
+        if self.env["DATABASE_URL"].startswith("sqlite"):
+            subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], env=self.env, check=True, capture_output=True)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"],
+            env=self.env,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.url}/", timeout=1).status_code == 200:
+                    return self
+            except httpx.TransportError:
+                time.sleep(0.05)
+        raise TimeoutError("Backend did not come up")
+
+    def __exit__(self, *exc) -> None:
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+async def setup_users(client: httpx.AsyncClient, count: int) -> list:
+    """Registers `count` users, logs them in and links each one to the fake Google account."""
+    users = []
+    for i in range(count):
+        email = f"bench-{i}-{int(time.time())}@example.com"
+        registered = await client.post("/api/v1/auth/register", json={"company_name": f"Bench {i}", "email": email, "password": PASSWORD})
+        registered.raise_for_status()
+        login = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+        login.raise_for_status()
+        user = {"id": registered.json()["id"], "email": email, "token": login.json()["access_token"]}
+        # Retried, since the fake token endpoint may be injecting failures
+        for _ in range(10):
+            linked = await client.get("/api/v1/integrations/google/callback", params={"code": "bench", "state": user["id"]})
+            if linked.status_code == 307:
+                break
+        else:
+            raise RuntimeError(f"Linking Google for {email} failed: {linked.status_code} {linked.text}")
+        users.append(user)
+    return users
+
+
+async def _login(client: httpx.AsyncClient, user: dict, args) -> bool:
+    response = await client.post("/api/v1/auth/login", json={"email": user["email"], "password": PASSWORD})
+    return response.status_code == 200
+
+
+async def _dashboard(client: httpx.AsyncClient, user: dict, args) -> bool:
+    params = {"refresh": "1"} if args.dashboard_refresh else {}
+    response = await client.get("/api/v1/analytics/dashboard", params=params, headers={"Authorization": f"Bearer {user['token']}"})
+    # A 200 that fell back to "pending_integration" is still a failed dashboard load
+    return response.status_code == 200 and response.json()["data"].get("status") == "active"
+
+
+async def _callback(client: httpx.AsyncClient, user: dict, args) -> bool:
+    response = await client.get("/api/v1/integrations/google/callback", params={"code": "bench", "state": user["id"]})
+    return response.status_code == 307
+
+
+SCENARIO_CALLS = {"login": _login, "dashboard": _dashboard, "callback": _callback}
+
+
+async def run_level(client: httpx.AsyncClient, scenario: str, concurrency: int, users: list, args) -> dict:
+    """Closed loop: `concurrency` clients each fire their next request as soon as the last one returns."""
+    call = SCENARIO_CALLS[scenario]
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(index: int):
+        nonlocal errors
+        n = index
+        while time.perf_counter() < deadline:
+            user = users[n % len(users)]
+            n += concurrency
+            started = time.perf_counter()
+            try:
+                ok = await call(client, user, args)
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    samples = np.array(latencies) * 1000
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / max(len(latencies), 1), 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(float(np.percentile(samples, 50)), 2) if len(samples) else None,
+            "p95": round(float(np.percentile(samples, 95)), 2) if len(samples) else None,
+            "p99": round(float(np.percentile(samples, 99)), 2) if len(samples) else None,
+            "mean": round(float(samples.mean()), 2) if len(samples) else None,
+            "max": round(float(samples.max()), 2) if len(samples) else None,
+        },
+    }
+
+
+def print_results(results: list, baseline: dict = None) -> None:
+    previous = {(r["scenario"], r["concurrency"]): r for r in (baseline or {}).get("results", [])}
+    print(f"\n{'scenario':<10} {'conc':>5} {'reqs':>7} {'err%':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['scenario']:<10} {r['concurrency']:>5} {r['requests']:>7} {r['error_rate'] * 100:>6.1f} {r['throughput_rps']:>9.1f} {lat['p50']:>9.1f} {lat['p95']:>9.1f} {lat['p99']:>9.1f}")
+        old = previous.get((r["scenario"], r["concurrency"]))
+        if old:
+            def delta(new, before):
+                return f"{(new - before) / before * 100:+.0f}%" if before else "n/a"
+            print(f"{'  vs base':<10} {'':>5} {'':>7} {'':>6} {delta(r['throughput_rps'], old['throughput_rps']):>9} "
+                  f"{delta(lat['p50'], old['latency_ms']['p50']):>9} {delta(lat['p95'], old['latency_ms']['p95']):>9} {delta(lat['p99'], old['latency_ms']['p99']):>9}")
+
+
+async def run(args, backend_url: str) -> list:
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 10, max_keepalive_connections=max(args.concurrency) + 10)
+    async with httpx.AsyncClient(base_url=backend_url, timeout=args.timeout, limits=limits) as client:
+        users = await setup_users(client, args.users)
+        results = []
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                print(f"Running {scenario} at concurrency {concurrency} for {args.duration}s...")
+                results.append(await run_level(client, scenario, concurrency, users, args))
+        return results
+
+
+def main(args) -> None:
+    config = FakeGoogleConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.quota_error_rate, args.properties)
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/load_test.db"
+
+    fake_google = FakeGoogleServer(config)
+    with fake_google as google_url, Backend(google_url, database_url, args.workers) as backend:
+        results = asyncio.run(run(args, backend.url))
+        upstream_calls = fake_google.calls
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "database": "sqlite" if database_url.startswith("sqlite") else database_url.split(":", 1)[0],
+            "workers": args.workers,
+            "users": args.users,
+            "duration_seconds": args.duration,
+            "dashboard_refresh": args.dashboard_refresh,
+            "fake_google": vars(config),
+            "upstream_calls": upstream_calls,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+def _csv(cast):
+    return lambda value: [cast(part) for part in value.split(",") if part]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=_csv(str), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=_csv(int), default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario and concurrency level")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--dashboard-refresh", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=120.0, help="Fake Google latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=40.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-error-rate", type=float, default=0.0)
+    parser.add_argument("--properties", type=int, default=3)
+    parser.add_argument("--database-url")
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    main(args)
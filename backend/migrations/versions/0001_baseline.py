@@ -0,0 +1,58 @@
+"""Baseline: users and integrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Databases created by the old `create_all` at startup already have these tables,
+so each table is only created when missing.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("company_name", sa.String()),
+            sa.Column("email", sa.String()),
+            sa.Column("hashed_password", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_company_name", "users", ["company_name"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if not _has_table("integrations"):
+        op.create_table(
+            "integrations",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("provider", sa.String()),
+            sa.Column("property_id", sa.String(), nullable=True),
+            sa.Column("encrypted_credentials", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_integrations_id", "integrations", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("integrations")
+    op.drop_table("users")
@@ -0,0 +1,120 @@
+"""GA4 property catalogue, metrics store, rollups and anomalies
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+Guarded like the baseline, for databases where `create_all` already made some of this.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_all never altered existing tables, so older databases lack these columns
+    with op.batch_alter_table("integrations") as batch:
+        if not _has_column("integrations", "properties_json"):
+            batch.add_column(sa.Column("properties_json", sa.Text(), nullable=True))
+        if not _has_column("integrations", "properties_synced_at"):
+            batch.add_column(sa.Column("properties_synced_at", sa.DateTime(), nullable=True))
+
+    if not _has_table("ga4_daily_metrics"):
+        op.create_table(
+            "ga4_daily_metrics",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("property_id", sa.String(), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("source", sa.String(), nullable=False),
+            sa.Column("medium", sa.String(), nullable=False),
+            sa.Column("campaign", sa.String(), nullable=False),
+            sa.Column("sessions", sa.Integer()),
+            sa.Column("active_users", sa.Integer()),
+            sa.Column("page_views", sa.Integer()),
+            sa.UniqueConstraint("property_id", "date", "source", "medium", "campaign", name="uq_ga4_daily_metric"),
+        )
+        op.create_index("ix_ga4_daily_metrics_id", "ga4_daily_metrics", ["id"])
+        op.create_index("ix_ga4_daily_metrics_property_source_date", "ga4_daily_metrics", ["property_id", "source", "medium", "date"])
+
+    if not _has_table("sync_watermarks"):
+        op.create_table(
+            "sync_watermarks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("integration_id", sa.Integer(), sa.ForeignKey("integrations.id")),
+            sa.Column("property_id", sa.String(), nullable=False),
+            sa.Column("report", sa.String(), nullable=False),
+            sa.Column("last_synced_date", sa.Date(), nullable=False),
+            sa.Column("updated_at", sa.DateTime()),
+            sa.UniqueConstraint("property_id", "report", name="uq_sync_watermark"),
+        )
+        op.create_index("ix_sync_watermarks_id", "sync_watermarks", ["id"])
+
+    if not _has_table("ga4_daily_totals"):
+        op.create_table(
+            "ga4_daily_totals",
+            sa.Column("property_id", sa.String(), primary_key=True),
+            sa.Column("date", sa.Date(), primary_key=True),
+            sa.Column("sessions", sa.Integer()),
+            sa.Column("active_users", sa.Integer()),
+            sa.Column("page_views", sa.Integer()),
+        )
+
+    if not _has_table("ga4_rollups"):
+        op.create_table(
+            "ga4_rollups",
+            sa.Column("property_id", sa.String(), primary_key=True),
+            sa.Column("window_days", sa.Integer(), primary_key=True),
+            sa.Column("start_date", sa.Date(), nullable=False),
+            sa.Column("end_date", sa.Date(), nullable=False),
+            sa.Column("sessions", sa.Integer()),
+            sa.Column("active_users", sa.Integer()),
+            sa.Column("page_views", sa.Integer()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if not _has_table("traffic_anomalies"):
+        op.create_table(
+            "traffic_anomalies",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("property_id", sa.String(), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("metric", sa.String(), nullable=False),
+            sa.Column("value", sa.Float(), nullable=False),
+            sa.Column("expected", sa.Float(), nullable=False),
+            sa.Column("z_score", sa.Float(), nullable=False),
+            sa.Column("rolling_z_score", sa.Float(), nullable=True),
+            sa.Column("direction", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.UniqueConstraint("property_id", "date", "metric", name="uq_traffic_anomaly"),
+        )
+        op.create_index("ix_traffic_anomalies_id", "traffic_anomalies", ["id"])
+        op.create_index("ix_traffic_anomalies_property_date", "traffic_anomalies", ["property_id", "date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("traffic_anomalies")
+    op.drop_table("ga4_rollups")
+    op.drop_table("ga4_daily_totals")
+    op.drop_table("sync_watermarks")
+    op.drop_table("ga4_daily_metrics")
+    with op.batch_alter_table("integrations") as batch:
+        batch.drop_column("properties_synced_at")
+        batch.drop_column("properties_json")
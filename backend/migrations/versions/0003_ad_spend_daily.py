@@ -0,0 +1,45 @@
+"""Daily ad spend from Google Ads and Meta Ads
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ad_spend_daily",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("integration_id", sa.Integer(), sa.ForeignKey("integrations.id"), nullable=False),
+        sa.Column("provider", sa.String(), nullable=False),
+        sa.Column("account_id", sa.String(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("campaign_id", sa.String(), nullable=False),
+        sa.Column("campaign_name", sa.String(), nullable=False),
+        sa.Column("impressions", sa.Integer()),
+        sa.Column("clicks", sa.Integer()),
+        sa.Column("spend", sa.Float()),
+        sa.Column("currency", sa.String(), nullable=True),
+        sa.Column("conversions", sa.Float()),
+        sa.UniqueConstraint("provider", "account_id", "date", "campaign_id", name="uq_ad_spend_daily"),
+    )
+    op.create_index("ix_ad_spend_daily_id", "ad_spend_daily", ["id"])
+    op.create_index("ix_ad_spend_daily_integration_date", "ad_spend_daily", ["integration_id", "date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ad_spend_daily")
@@ -0,0 +1,33 @@
+"""Key events and revenue on GA4 daily metrics, for attribution
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+
+Existing rows read as zero until re-synced; delete a property's `sync_watermarks` row to backfill it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("ga4_daily_metrics") as batch:
+        batch.add_column(sa.Column("key_events", sa.Float(), nullable=True, server_default="0"))
+        batch.add_column(sa.Column("revenue", sa.Float(), nullable=True, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("ga4_daily_metrics") as batch:
+        batch.drop_column("revenue")
+        batch.drop_column("key_events")
@@ -0,0 +1,43 @@
+"""Stored Holt-Winters state for daily traffic forecasts
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "traffic_forecast_models",
+        sa.Column("property_id", sa.String(), primary_key=True),
+        sa.Column("metric", sa.String(), primary_key=True),
+        sa.Column("alpha", sa.Float(), nullable=False),
+        sa.Column("beta", sa.Float(), nullable=False),
+        sa.Column("gamma", sa.Float(), nullable=False),
+        sa.Column("level", sa.Float(), nullable=False),
+        sa.Column("trend", sa.Float(), nullable=False),
+        sa.Column("season", sa.Text(), nullable=False),
+        sa.Column("sse", sa.Float(), nullable=False),
+        sa.Column("observations", sa.Integer(), nullable=False),
+        sa.Column("state_date", sa.Date(), nullable=False),
+        sa.Column("fitted_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("traffic_forecast_models")
@@ -0,0 +1,48 @@
+"""Monthly per-channel GA4 totals for long date ranges
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ga4_monthly_channels",
+        sa.Column("property_id", sa.String(), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("source", sa.String(), primary_key=True),
+        sa.Column("medium", sa.String(), primary_key=True),
+        sa.Column("sessions", sa.Integer()),
+        sa.Column("active_users", sa.Integer()),
+        sa.Column("page_views", sa.Integer()),
+    )
+
+    # Backfill from the fact table; after this the ingestion worker keeps the months it touches up to date
+    if op.get_bind().dialect.name == "sqlite":
+        month = "date(date, 'start of month')"
+    else:
+        month = "CAST(date_trunc('month', date) AS DATE)"
+    op.execute(
+        "INSERT INTO ga4_monthly_channels (property_id, month, source, medium, sessions, active_users, page_views) "
+        f"SELECT property_id, {month}, source, medium, SUM(sessions), SUM(active_users), SUM(page_views) "
+        f"FROM ga4_daily_metrics GROUP BY property_id, {month}, source, medium"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ga4_monthly_channels")